@@ -1,9 +1,97 @@
 # -*- coding: utf-8 -*-
-__version__ = "0.2024.08.27"
+__version__ = "0.2026.10.18"
+__Files__ = "HoneycombLattice.py,HoneycombTiles.py,HoneycombCache.py,HoneycombBackground.py,HoneycombMesh.py"
 
 #Honeycomb macro -- creates a feature python parametric honeycomb object for Part Design workbench
 #2021, by <TheMarkster> LGPL2.1 or later
 import FreeCAD, FreeCADGui, Part
+import math, time, json, sys, collections
+import numpy as np
+import HoneycombLattice, HoneycombTiles, HoneycombCache, HoneycombBackground, HoneycombMesh
+try:
+    import resource
+except ImportError:
+    resource = None #not available on Windows
+
+#every property the solid depends on
+GEOMETRY = ("Radius", "Separation", "Length", "Width", "Height", "EllipticalGrid", "XAdjust", "YAdjust", "BorderOffset",
+            "BorderHeightOffset", "CountXAdjust", "CountYAdjust", "SquareGrid", "Version", "BoundaryCut", "SquareStrips", "Tiles", "WrapRadius",
+            "Grading", "GradedRadius", "GradingAngle", "GradingSteps")
+
+def peakMemory():
+    '''peak resident memory of this process in KB, None where it cannot be measured'''
+    if not resource:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def topologySize(shape):
+    '''(faces, edges, vertexes) of shape, (None, None, None) if it is not a shape'''
+    if not isinstance(shape, Part.Shape):
+        return (None, None, None)
+    if hasattr(shape, "countElement"):
+        return tuple(shape.countElement(element) for element in ("Face", "Edge", "Vertex"))
+    return (len(shape.Faces), len(shape.Edges), len(shape.Vertexes))
+
+def latticeCenter(template, centres):
+    '''center of the bounding box of template placed at each of centres'''
+    bb = template.BoundBox
+    xmin, ymin, xmax, ymax = HoneycombLattice.latticeBounds(centres, (bb.XMin, bb.YMin, bb.XMax, bb.YMax))
+    return FreeCAD.Vector((xmin + xmax) / 2, (ymin + ymax) / 2, 0)
+
+def resultSize(result):
+    '''rough estimate in bytes of the memory held by a stage result'''
+    if isinstance(result, (tuple, list)):
+        return sum(resultSize(r) for r in result)
+    if hasattr(result, "nbytes"): #numpy array
+        return result.nbytes
+    if isinstance(result, Part.Shape):
+        faces, edges, vertexes = topologySize(result)
+        return 2048 * faces + 512 * edges + 128 * vertexes
+    return 64
+
+def memoryBudget():
+    '''size limit of shapeCache in bytes, MemoryCacheSizeMB in BaseApp/Preferences/Macros/Honeycomb'''
+    return HoneycombCache.parameters().GetInt("MemoryCacheSizeMB", 256) * 1024 * 1024
+
+class ShapeCache:
+    '''least recently used cache of lattice and cut results shared by every Honeycomb object in the session,
+    bounded by an estimate of the memory the results hold'''
+    def __init__(self):
+        self.entries = collections.OrderedDict()
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        '''the result stored under key, otherwise calls build() and stores its result'''
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        result = build()
+        size = resultSize(result)
+        budget = memoryBudget()
+        if size <= budget:
+            self.entries[key] = (result, size)
+            self.used += size
+        while self.used > budget:
+            oldKey, (oldResult, oldSize) = self.entries.popitem(last = False)
+            self.used -= oldSize
+        return result
+
+    def clear(self):
+        self.entries.clear()
+        self.used = 0
+
+    def stats(self):
+        return {"entries": len(self.entries), "used_kb": self.used // 1024, "budget_kb": memoryBudget() // 1024,
+                "hits": self.hits, "misses": self.misses}
+
+shapeCache = ShapeCache()
+
 class Honeycomb:
     def __init__(self,obj):
         obj.addExtension("Part::AttachExtensionPython")
@@ -17,183 +105,1018 @@ class Honeycomb:
         obj.addProperty("App::PropertyFloatConstraint","YAdjust","Honeycomb","Adjust hexagons in the Y direction").YAdjust = (0,-10e4,10e4,.1)
         obj.addProperty("App::PropertyFloat","BorderOffset","Honeycomb","Offset for border (0 = no border) -1 for inward offset").BorderOffset = 1
         obj.addProperty("App::PropertyFloatConstraint","BorderHeightOffset","Honeycomb","Height Offset for border (0 = same as Height)").BorderHeightOffset = (0.1,-10e4,10e4,.1)
+        obj.addProperty("App::PropertyLink","Outline","Honeycomb","Closed sketch or planar face to fill with the grid in place of the rectangle or ellipse of Width and Length")
+        obj.addProperty("App::PropertyFloat","WrapRadius","Honeycomb","default: 0 -- if greater than 0, wrap the grid around a cylinder of this inner radius, Length along its axis and Height outwards").WrapRadius = 0
         obj.addProperty("App::PropertyLink","Profile","Honeycomb","Profile, e.g. sketch, to use in place of hexagon, should have radius = 1, centered on origin")
         obj.addProperty("App::PropertyInteger","CountXAdjust","Honeycomb","default: 0 -- amount to add to number of hexagons on X axis")
         obj.addProperty("App::PropertyInteger","CountYAdjust","Honeycomb","default: 0 -- amount to add to number of hexagons on Y axis")
         obj.addProperty("App::PropertyString","Version","Honeycomb","Version of macro this object was created with").Version = __version__
         obj.addProperty("App::PropertyBool","SquareGrid","Honeycomb","If true, make a square grid instead of hexagon grid").SquareGrid = False
+        obj.addProperty("App::PropertyBool","BoundaryCut","Honeycomb","If true, only cells crossing the outline go through the boolean cut, cells fully inside become holes directly and cells outside are dropped").BoundaryCut = True
+        obj.addProperty("App::PropertyBool","SquareStrips","Honeycomb","If true and SquareGrid, build the ribs from one strip per row and column instead of one square per cell (built-in square cell only)").SquareStrips = False
+        obj.addProperty("App::PropertyInteger","Tiles","Honeycomb","default: 0 -- if 2 or more, cut the grid as this many vertical tiles in parallel worker processes").Tiles = 0
+        obj.addProperty("App::PropertyInteger","TileWorkers","Honeycomb","default: 0 -- number of worker processes for Tiles, 0 for one per CPU core").TileWorkers = 0
+        obj.addProperty("App::PropertyBool","DiskCache","Honeycomb","If true, keep the finished solid in the on-disk cache and load it from there when the same parameters come again").DiskCache = False
+        obj.addProperty("App::PropertyBool","ParametersOnly","Honeycomb","If true, save only the parameters with the document, the shape is rebuilt (or loaded from the disk cache) on the first recompute after opening").ParametersOnly = False
+        obj.addProperty("App::PropertyString","ShapeHash","Honeycomb","Hash of the inputs of the saved parameters, the disk cache key of the solid")
+        obj.setEditorMode("ShapeHash",1)
+        obj.addProperty("App::PropertyEnumeration","DraftMode","Draft","Full: always build the grid, Auto: draft above DraftCells cells or while the Honeycomb, its Profile or Outline is edited, Draft: always draft")
+        obj.DraftMode = ["Auto","Full","Draft"]
+        obj.DraftMode = "Full"
+        obj.addProperty("App::PropertyEnumeration","DraftStyle","Draft","Slab: outline extruded as a solid slab, Outline: only the outline of the cell field")
+        obj.DraftStyle = ["Slab","Outline"]
+        obj.DraftStyle = "Slab"
+        obj.addProperty("App::PropertyInteger","DraftCells","Draft","In Auto DraftMode, draft when the grid has more cells than this").DraftCells = 20000
+        obj.addProperty("App::PropertyInteger","MaxCells","Honeycomb","default: 1000000 -- refuse to build a grid with more cells than this, 0 for no limit").MaxCells = 1000000
+        obj.addProperty("App::PropertyBool","Background","Background","If true, build the grid in a background worker process and show the draft until it is done").Background = False
+        obj.addProperty("App::PropertyInteger","BackgroundDelay","Background","default: 500 -- milliseconds without further edits before the background build starts").BackgroundDelay = 500
+        obj.addProperty("App::PropertyEnumeration","Grading","Grading","None: all cells of Radius, Radial, Linear or Map: cells shrink from Radius to GradedRadius as the field goes from 0 to 1")
+        obj.Grading = ["None","Radial","Linear","Map"]
+        obj.Grading = "None"
+        obj.addProperty("App::PropertyFloat","GradedRadius","Grading","Circumradius of the cells where the field is 1, not more than Radius").GradedRadius = 0.5
+        obj.addProperty("App::PropertyFloat","GradingAngle","Grading","Direction of the Linear field in degrees from the x axis").GradingAngle = 0
+        obj.addProperty("App::PropertyFile","GradingMap","Grading","Csv file of numbers from 0 to 1, or grey scale image, stretched over the grid as the Map field")
+        obj.addProperty("App::PropertyInteger","GradingSteps","Grading","default: 16 -- number of cell sizes, the cells of each size share one shape, 0 for any size").GradingSteps = 16
+        obj.addProperty("App::PropertyBool","Profiling","Profiling","If true, record wall time, cell count, topology size and peak memory of each stage on recompute").Profiling = False
+        obj.addProperty("App::PropertyStringList","ProfileReport","Profiling","Per stage report of the last profiled recompute",8)
+        obj.setEditorMode("ProfileReport",1)
         obj.setEditorMode("Placement",0)
         obj.Proxy = self
         self.fpName = obj.Name
 
-    def makeHexagon(self,radius,origin):
+    def prepareProfile(self, shape):
+        '''face of the Profile shape, made with FaceMakerBullseye so nested wires become holes'''
+        if shape.ShapeType == "Face":
+            return shape.copy()
+        return Part.makeFace(shape.copy(),"Part::FaceMakerBullseye")
+
+    def profileTemplate(self, fp):
+        '''face of the checked Profile, made once and shared while the profile shape does not change,
+        None if no Profile is linked'''
+        if not (hasattr(fp,"Profile") and fp.Profile):
+            return None
+        profile = fp.Profile
+        if not hasattr(profile,"Shape") or profile.Shape.isNull():
+            raise Exception("Invalid profile\n")
+        return self.shared("profile", HoneycombCache.shapeHash(profile.Shape), lambda: self.prepareProfile(profile.Shape))
+
+    def makeHexagon(self,fp,radius,origin):
         '''makes a hexagon based on radius and origin, returns it as a wire
-        unless a profile is linked to Profile property'''
-        fp = FreeCAD.ActiveDocument.getObject(self.fpName)
-        if hasattr(fp,"Profile") and fp.Profile:
-            profile = fp.Profile
-            if not hasattr(profile,"Shape"):
-                raise Exception("Invalid profile\n")
-            shp = profile.Shape.copy()
+        unless a profile is linked to Profile property, then the profile face'''
+        prepared = self.profileTemplate(fp)
+        if prepared is not None:
+            shp = prepared.copy()
             shp.Placement.move(origin)
             shp.scale(radius,origin)
             return shp
         else:
-            sin60 = 0.8660254037844386
-            tups = [(-1,0,0),(-.5,sin60,0),(.5,sin60,0),(1,0,0),(.5,-sin60,0),(-.5,-sin60,0),(-1,0,0)]
-            pts = [FreeCAD.Vector(tup).add(origin) for tup in tups]
+            pts = [FreeCAD.Vector(x, y, 0).add(origin) for x, y in HoneycombLattice.HEXAGON.tolist()]
             poly = Part.makePolygon(pts).scale(radius,origin)
             return poly
 
 
-    def makeCross(self,radius,origin):
-        '''makes cross based on radius and origin, returns it as a wire
+    def makeCross(self,fp,radius,origin):
+        '''makes cross based on radius and origin, returns it as a face
         unless a profile is linked to Profile property'''
-        fp = FreeCAD.ActiveDocument.getObject(self.fpName)
-        if hasattr(fp,"Profile") and fp.Profile:
-            profile = fp.Profile
-            if not hasattr(profile,"Shape"):
-                raise Exception("Invalid profile\n")
-            shp = profile.Shape.copy()
-            shp.Placement.move(origin)
-            shp.scale(radius,origin)
-            face = Part.makeFace(shp,"Part::FaceMakerBullseye")
+        prepared = self.profileTemplate(fp)
+        if prepared is not None:
+            face = prepared.copy()
+            face.Placement.move(origin)
+            face.scale(radius,origin)
             return face
         else:
-            tups = [(-1,-1,0),(1,-1,0),(1,1,0),(1,1,0),(-1,1,0),(-1,-1,0)]
-            pts = [FreeCAD.Vector(tup).add(origin) for tup in tups]
+            pts = [FreeCAD.Vector(x, y, 0).add(origin) for x, y in HoneycombLattice.SQUARE.tolist()]
             poly = Part.makePolygon(pts).scale(radius,origin)
             face = Part.makeFace(poly, "Part::FaceMakerBullseye")
             #Part.show(face,'face"')
             return face
 
+    def makeLattice(self, template, centres):
+        '''places template at each (x, y) row of the centres array, returns a list of located copies
+        that all share the template's underlying TShape, so the cell is only built once'''
+        rot = FreeCAD.Rotation()
+        return [template.moved(FreeCAD.Placement(FreeCAD.Vector(x, y, 0), rot)) for x, y in centres.tolist()]
+
+    def crossLattice(self, fp):
+        '''lattice stage of the square grid, returns (cross_faces, lattice) for cutOutline'''
+
+        width, length = self.extent(fp)
+        centres = HoneycombLattice.squareCentres(fp.Radius, fp.Separation, width, length, fp.XAdjust, fp.YAdjust,
+                                                 getattr(fp,"CountXAdjust",0), getattr(fp,"CountYAdjust",0))
+        template = self.makeCross(fp, fp.Radius, FreeCAD.Vector(0,0,0))
+        scales = self.cellScales(fp, centres)
+        if self.useLattice(fp):
+            return (None, (template, centres, self.cellRadius(fp, template, fp.Radius * math.sqrt(2)), scales))
+        #the cells stay 2D faces like the hexagons, the outline face is cut by them and extruded once at the end
+        cross_faces = Part.makeCompound(self.placeCells(template, centres, scales))
+        return (cross_faces, None)
+
     def makeCrossGrid(self, fp):
-        #face = self.makeCross(1, FreeCAD.Vector(0,0,0))
-
-        yInt = (2 * fp.Radius+fp.Separation)
-        xInt = (2 * fp.Radius+fp.Separation)
-        firstX = 0
-        firstY = 0
-        countX = round(fp.Width/xInt) + 1
-        countY = round(fp.Length/yInt) + 1
-        if hasattr(fp,"CountXAdjust"):
-            countX += fp.CountXAdjust
-            countY += fp.CountYAdjust
-        vectors = []
-        for xx in range(-1,int(countX)):
-            for yy in range(-1,int(countY)):
-                vectors.append(FreeCAD.Vector(firstX + xx * xInt, firstY + yy * yInt, 0)+FreeCAD.Vector(fp.XAdjust,fp.YAdjust,0))
-        array = [self.makeCross(fp.Radius, v) for v in vectors]
-        #crosses = Part.makeCompound(array)
-        crosses = Part.makeCompound(array)
-
-        cross_faces = crosses.extrude(FreeCAD.Vector(0,0,1)).removeSplitter()
-        #cross_faces = Part.makeFace(crosses,"Part::FaceMakerCheese")
-       # rect = Part.makePolygon()
-        #Part.show(cross_faces, "cross_faces")
-        solid = self.handleElliptical(fp, cross_faces)
+        solid = self.handleElliptical(fp, *self.crossLattice(fp))
         return solid
 
-
+    def honeycombLattice(self, fp):
+        '''lattice stage of the hexagon grid, returns (hex_faces, lattice) for cutOutline'''
+        width, length = self.extent(fp)
+        centres = HoneycombLattice.honeycombCentres(fp.Radius, fp.Separation, width, length, fp.XAdjust, fp.YAdjust,
+                                                    getattr(fp,"CountXAdjust",0), getattr(fp,"CountYAdjust",0))
+        template = self.makeHexagon(fp, fp.Radius, FreeCAD.Vector(0,0,0))
+        scales = self.cellScales(fp, centres)
+        if self.useLattice(fp):
+            return (None, (template, centres, self.cellRadius(fp, template, fp.Radius), scales))
+        #the cells are disjoint, so one face placed at every centre is what FaceMakerCheese would make of all the wires
+        hex_faces = self.profiled(fp, "facemaker", lambda: Part.makeCompound(self.placeCells(template, centres, scales, self.cellFace)))
+        return (hex_faces, None)
 
     def makeHoneycomb(self,fp):
-        tan15 = 0.2679491924311227
-        sin60 = 0.8660254037844386
-        yInt = (2 * fp.Radius + fp.Separation - tan15 * fp.Radius)
-        xInt = (2 * sin60 * (fp.Radius * 2 + fp.Separation - tan15 * fp.Radius))
-        array2XPos = (sin60 * (fp.Radius * 2 + fp.Separation - tan15 * fp.Radius))
-        array2YPos = yInt / 2.0
-        firstX = fp.Radius
-        firstY = fp.Radius
-        countX = round(fp.Width/xInt) + 1
-        countY = round(fp.Length/yInt) + 1
-        if hasattr(fp,"CountXAdjust"):
-            countX += fp.CountXAdjust
-            countY += fp.CountYAdjust
-        vectors = []
-        for xx in range(-1,int(countX)):
-            for yy in range(-1,int(countY)):
-                vectors.append(FreeCAD.Vector(firstX + xx * xInt, firstY + yy * yInt, 0)+FreeCAD.Vector(fp.XAdjust,fp.YAdjust,0))
-        array = [self.makeHexagon(fp.Radius, v) for v in vectors]
-        array.extend([self.makeHexagon(fp.Radius, v  + FreeCAD.Vector(array2XPos,array2YPos,0)) for v in vectors[:-int(countY+1)]])
-        hexagons = Part.makeCompound(array)
-        hex_faces = Part.makeFace(hexagons,"Part::FaceMakerCheese")
-        solid = self.handleElliptical(fp, hex_faces)
+        solid = self.handleElliptical(fp, *self.honeycombLattice(fp))
         return solid
 
+    def useLattice(self, fp):
+        '''True if the cells are classified against the outline instead of cut as one compound'''
+        return (hasattr(fp,"BoundaryCut") and fp.BoundaryCut) or self.tiles(fp) > 1 or self.strips(fp)
+
+    def strips(self, fp):
+        '''True if the square grid ribs are built from row and column strips, only for the built-in square cell
+        of one size'''
+        return hasattr(fp,"SquareStrips") and fp.SquareStrips and fp.SquareGrid and not fp.Profile and not self.graded(fp)
+
+    def tiles(self, fp):
+        '''number of tiles, graded grids are not tiled'''
+        return fp.Tiles if hasattr(fp,"Tiles") and not self.graded(fp) else 0
+
+    def graded(self, fp):
+        return hasattr(fp,"Grading") and fp.Grading != "None"
+
+    def densityMap(self, fp):
+        '''2D array of GradingMap, a csv file of numbers or an image read as grey levels from 0 to 1'''
+        path = fp.GradingMap
+        if not path:
+            raise Exception("Grading Map needs a GradingMap file\n")
+        if path.lower().endswith((".csv", ".txt")):
+            return np.loadtxt(path, delimiter = ",", ndmin = 2)
+        from PySide import QtGui
+        image = QtGui.QImage(path)
+        if image.isNull():
+            raise Exception(f"Cannot read GradingMap {path}\n")
+        image = image.convertToFormat(QtGui.QImage.Format_Grayscale8)
+        data = np.frombuffer(bytes(image.constBits()), np.uint8, image.bytesPerLine() * image.height())
+        return data.reshape(image.height(), image.bytesPerLine())[:, :image.width()] / 255.0
+
+    def gradingKey(self, fp):
+        '''the properties the grading reads, GradingMap by the hash of its contents'''
+        if not self.graded(fp):
+            return None
+        densityMap = HoneycombCache.fileHash(fp.GradingMap) if fp.Grading == "Map" and fp.GradingMap else None
+        return (fp.Grading, fp.GradedRadius, fp.GradingAngle, fp.GradingSteps, densityMap)
+
+    def cellScales(self, fp, centres):
+        '''scale of every cell from the grading field, evaluated at all centres at once, None if not graded'''
+        if not self.graded(fp):
+            return None
+        if not 0 < fp.GradedRadius <= fp.Radius:
+            raise Exception("GradedRadius must be more than 0 and not more than Radius\n")
+        width, length = self.extent(fp)
+        densityMap = None
+        if fp.Grading == "Map":
+            key = self.gradingKey(fp)[-1]
+            densityMap = self.shared("density map", key, lambda: self.densityMap(fp)) if key else self.densityMap(fp)
+        field = HoneycombLattice.gradingField(centres, fp.Grading, width, length, fp.GradingAngle, densityMap)
+        return HoneycombLattice.gradedScales(field, fp.GradedRadius / fp.Radius, fp.GradingSteps)
+
+    def placeCells(self, template, centres, scales, make = None):
+        '''makeLattice of make(template) at centres, with scales one copy of template is scaled for each
+        distinct scale, so the cells of each size share their shape'''
+        make = make or (lambda shape: shape)
+        if scales is None:
+            return self.makeLattice(make(template), centres)
+        cells = []
+        for scale in np.unique(scales).tolist():
+            cell = template.copy()
+            cell.scale(scale, FreeCAD.Vector(0,0,0))
+            cells += self.makeLattice(make(cell), centres[scales == scale])
+        return cells
 
-    def handleElliptical(self, fp, hex_faces):
+    def cellRadius(self, fp, template, radius):
+        '''circumradius of a cell, radius for the built-in cells, otherwise taken
+        from the bounding box of the scaled profile'''
+        if hasattr(fp,"Profile") and fp.Profile:
+            bb = template.BoundBox
+            return max(math.hypot(x, y) for x in (bb.XMin, bb.XMax) for y in (bb.YMin, bb.YMax))
+        return radius
+
+    def cellFace(self, template):
+        '''template as a face, for the boolean cut'''
+        if template.ShapeType == "Face":
+            return template
+        return Part.makeFace(template,"Part::FaceMakerCheese")
+
+    def holeWire(self, face, template):
+        '''outer wire of template oriented to be added to face as a hole'''
+        return HoneycombTiles.holeWire(face, template)
+
+    def cutClassified(self, fp, face, lattice, distance):
+        '''cuts the cells of lattice = (template, centres, cellRadius, scales) out of face
+        distance(xs, ys) gives the signed distances of all centres to the outline of face, negative inside
+        cells outside are dropped, cells inside are added as holes and only cells
+        crossing the outline go through the boolean cut, scales is None or the scale of each cell'''
+        template, centres, cellRadius, scales = lattice
+        if self.strips(fp):
+            return self.profiled(fp, "strips", lambda: self.cutStrips(fp, face, centres))
+        flags = HoneycombLattice.classifyCells(distance(centres[:, 0], centres[:, 1]), cellRadius if scales is None else cellRadius * scales)
+        if self.tiles(fp) > 1:
+            return self.profiled(fp, "tiled cut", lambda: HoneycombTiles.cutTiled(face, self.cellFace(template), self.holeWire(face, template), centres, flags, cellRadius, fp.Tiles, fp.TileWorkers))
+        if len(template.Wires) == 1:
+            holes = flags == HoneycombLattice.CELL_INSIDE
+            boundary = flags == HoneycombLattice.CELL_BOUNDARY
+        else:
+            #cells made of several wires cannot be added as a single hole
+            holes = np.zeros(len(flags), dtype = bool)
+            boundary = flags != HoneycombLattice.CELL_OUTSIDE
+        subset = lambda mask: None if scales is None else scales[mask]
+        #the outline is the outer wire and the inner cells are its holes, no face maker or boolean needed for them
+        cut = face.copy()
+        if holes.any():
+            cut.cutHoles(self.placeCells(template, centres[holes], subset(holes), lambda cell: self.holeWire(face, cell)))
+        if boundary.any():
+            tool = Part.makeCompound(self.placeCells(template, centres[boundary], subset(boundary), self.cellFace))
+            cut = self.profiled(fp, "boolean cut", lambda: cut.cut(tool))
+        return cut
+
+    def cutStrips(self, fp, face, centres):
+        '''square grid from strips: the ribs between the columns and between the rows of cells,
+        plus the frame around the lattice, are fused and intersected with face, so the booleans
+        see one shape per row and column instead of one per cell'''
+        if not len(centres):
+            return face.copy()
+        half = fp.Radius
+        z = face.BoundBox.ZMin
+        xmin, ymin, xmax, ymax = HoneycombLattice.latticeBounds(centres, (-half, -half, half, half))
+        fb = face.BoundBox
+        left, bottom, right, top = fb.XMin - 1, fb.YMin - 1, fb.XMax + 1, fb.YMax + 1
+        rect = lambda x0, y0, x1, y1: Part.makePlane(x1 - x0, y1 - y0, FreeCAD.Vector(x0, y0, z))
+        strips = [rect(lo, ymin, hi, ymax) for lo, hi in HoneycombLattice.ribIntervals(centres[:, 0], half).tolist()]
+        strips += [rect(xmin, lo, xmax, hi) for lo, hi in HoneycombLattice.ribIntervals(centres[:, 1], half).tolist()]
+        #frame: whatever of face lies outside the lattice is not cut
+        frame = [(left, bottom, xmin, top), (xmax, bottom, right, top), (xmin, bottom, xmax, ymin), (xmin, ymax, xmax, top)]
+        strips += [rect(*f) for f in frame if f[2] > f[0] and f[3] > f[1]]
+        ribs = strips[0].multiFuse(strips[1:]) if len(strips) > 1 else strips[0]
+        return face.common(ribs).removeSplitter()
+
+    def makeEllipse(self, fp, offset):
+        '''makes the elliptical outline grown by offset, minor diameter = Width, major diameter = Length'''
+        if fp.Width >= fp.Length:
+            return Part.Ellipse(FreeCAD.Vector(0,0,0),fp.Width / 2 + offset,fp.Length / 2 + offset).toShape()
+        ellipse = Part.Ellipse(FreeCAD.Vector(0,0,0),fp.Length / 2 + offset,fp.Width / 2 + offset)
+        plm = FreeCAD.Placement()
+        plm.Rotation = FreeCAD.Rotation(FreeCAD.Vector(0,0,1),90)
+        ellipse.rotate(plm)
+        return ellipse.toShape()
+
+    def outlineKind(self, fp):
+        '''"outline" if a shape is linked to Outline, otherwise "ellipse" or "rectangle"'''
+        if hasattr(fp,"Outline") and fp.Outline:
+            return "outline"
+        return "ellipse" if fp.EllipticalGrid else "rectangle"
+
+    def outlineHash(self, fp):
+        return HoneycombCache.shapeHash(fp.Outline.Shape) if self.outlineKind(fp) == "outline" else None
+
+    def prepareOutline(self, obj):
+        '''face of the Outline object in the xy plane, a sketch is taken in its own coordinates'''
+        if not hasattr(obj,"Shape") or obj.Shape.isNull():
+            raise Exception("Invalid outline\n")
+        shp = obj.Shape.copy()
+        if obj.isDerivedFrom("Sketcher::SketchObject"):
+            shp.Placement = obj.Placement.inverse().multiply(shp.Placement)
+        face = shp.Faces[0] if shp.Faces else Part.makeFace(shp,"Part::FaceMakerBullseye")
+        if abs(abs(face.normalAt(0,0).z) - 1) > 1e-7 or face.BoundBox.ZLength > 1e-7:
+            raise Exception("Outline must be planar and parallel to the xy plane\n")
+        return face
+
+    def linkedOutline(self, fp):
+        '''the face of Outline, made once and shared while the outline shape does not change'''
+        return self.shared("outline", self.outlineHash(fp), lambda: self.prepareOutline(fp.Outline))
+
+    def extent(self, fp):
+        '''(width, length) of the area the lattice has to cover'''
+        if self.wrapRadius(fp) > 0:
+            return (2 * math.pi * fp.WrapRadius, fp.Length)
+        if self.outlineKind(fp) == "outline":
+            bb = self.linkedOutline(fp).BoundBox
+            return (bb.XLength, bb.YLength)
+        return (fp.Width, fp.Length)
+
+    def outlineRings(self, outline, deflection):
+        '''wires of outline as closed polygons, (K, 2) arrays'''
+        rings = []
+        for wire in outline.Wires:
+            pts = np.array([(v.x, v.y) for v in wire.discretize(Deflection = deflection)])
+            rings.append(pts[:-1] if len(pts) > 1 and np.allclose(pts[0], pts[-1]) else pts)
+        return rings
+
+    def outlineDistance(self, outline, cellRadius):
+        '''distance(xs, ys) to the boundary of outline for cutClassified, through the bucket grid of
+        polygonDistance, shortened by the deflection of the polygons so curved edges are never missed'''
+        deflection = max(cellRadius * 0.01, 1e-4)
+        rings = self.outlineRings(outline, deflection)
+        def distance(xs, ys):
+            d = HoneycombLattice.polygonDistance(xs, ys, rings, 2 * cellRadius)
+            return np.sign(d) * np.maximum(np.abs(d) - deflection, 0)
+        return distance
+
+    def makeOutline(self, fp):
+        '''makes the rectangular, elliptical or linked outline face the grid is cut from'''
+        if self.outlineKind(fp) == "outline":
+            return self.linkedOutline(fp)
         if not fp.EllipticalGrid:
             rectTups = [(0,0,0),(fp.Width,0,0),(fp.Width,fp.Length,0),(0,fp.Length,0),(0,0,0)]
             rect_pts = [FreeCAD.Vector(tup) + FreeCAD.Vector(-fp.Radius,0,0) for tup in rectTups]
             rect = Part.makePolygon(rect_pts)
-            rect_face = Part.makeFace(rect,"Part::FaceMakerCheese")
-            cut = rect_face.cut(hex_faces)
-            cut.translate(-cut.BoundBox.Center)
-            if hasattr(cut,"Face1"):
-                normal = cut.Face1.normalAt(0,0).normalize()
-            else:
-                normal = FreeCAD.Vector(0,0,1)
-            cut = cut.extrude(normal * fp.Height)
-            if fp.BorderOffset == 0:
-                return cut
+            return Part.makeFace(rect,"Part::FaceMakerCheese")
+        return Part.makeFace(self.makeEllipse(fp, 0),"Part::FaceMakerCheese")
+
+    def cutOutline(self, fp, hex_faces, lattice = None):
+        '''cuts hex_faces out of the outline, or if lattice = (template, centres, cellRadius, scales)
+        is given, the cells of the lattice classified against the outline
+        returns the 2D cut face centered where the final solid goes, or for a linked outline where the outline is'''
+        if self.wrapRadius(fp) > 0:
+            return self.cutWrapped(fp, lattice)
+        outline = self.makeOutline(fp)
+        kind = self.outlineKind(fp)
+        if kind == "rectangle":
+            if lattice:
+                cut = self.cutClassified(fp, outline, lattice, lambda xs, ys: HoneycombLattice.rectangleDistance(xs, ys, -fp.Radius, 0, fp.Width - fp.Radius, fp.Length))
             else:
-                border = rect_face.makeOffset2D(fp.BorderOffset, join=2, fill=True)
-                border.translate(-border.BoundBox.Center)
-                border = border.extrude(border.Face1.normalAt(0,0).normalize()*(fp.Height + fp.BorderHeightOffset))
-                fuse = border.fuse(cut)
-                return fuse
+                cut = self.profiled(fp, "boolean cut", lambda: outline.cut(hex_faces))
+            cut.translate(-cut.BoundBox.Center)
+            return cut
+        if lattice:
+            template, centres, cellRadius, scales = lattice
+            if len(centres):
+                offset = outline.BoundBox.Center - latticeCenter(template, centres) + FreeCAD.Vector(fp.XAdjust, fp.YAdjust, 0)
+                lattice = (template, centres + (offset.x, offset.y), cellRadius, scales)
+            if kind == "outline":
+                return self.cutClassified(fp, outline, lattice, self.outlineDistance(outline, cellRadius))
+            return self.cutClassified(fp, outline, lattice, lambda xs, ys: HoneycombLattice.ellipseDistance(xs, ys, fp.Width / 2, fp.Length / 2))
+        offset = outline.BoundBox.Center - hex_faces.BoundBox.Center + FreeCAD.Vector(fp.XAdjust, fp.YAdjust, 0)
+        hex_faces = hex_faces.moved(FreeCAD.Placement(offset, FreeCAD.Rotation()))
+        return self.profiled(fp, "boolean cut", lambda: outline.cut(hex_faces))
+
+    def makeBorder(self, fp):
+        '''makes the 2D border ring around (or inside) the outline, None if BorderOffset is 0
+        or the grid is wrapped, then the border is part of the sleeve'''
+        if fp.BorderOffset == 0 or self.wrapRadius(fp) > 0:
+            return None
+        outline = self.makeOutline(fp)
+        kind = self.outlineKind(fp)
+        if kind == "rectangle":
+            border = outline.makeOffset2D(fp.BorderOffset, join=2, fill=True)
+            border.translate(-border.BoundBox.Center)
+            return border
+        if kind == "outline":
+            offset_face = outline.makeOffset2D(fp.BorderOffset, join=0)
+            return offset_face.cut(outline) if fp.BorderOffset > 0 else outline.cut(offset_face)
+        ellipse_offset_face = Part.makeFace(self.makeEllipse(fp, fp.BorderOffset),"Part::FaceMakerCheese")
+        if fp.BorderOffset > 0:
+            return ellipse_offset_face.cut(outline)
+        return outline.cut(ellipse_offset_face)
+
+    def innerPoint(self, face):
+        '''a point inside face, the centre of the first triangle of its tessellation'''
+        points, triangles = face.tessellate(0.1)
+        return (points[triangles[0][0]] + points[triangles[0][1]] + points[triangles[0][2]]) * (1.0 / 3)
+
+    def mergeBorder(self, fp, cut, border, normal):
+        '''grid and border as one solid without a 3D fuse, None if it cannot be made this way
+        the 2D grid and ring are fused so they share their edges and extruded together to the lower of the two
+        heights, then the faces of the higher part are extruded on from there, the prisms share the faces
+        between them, which are dropped, and the remaining faces make the solid'''
+        step = fp.BorderHeightOffset
+        low = fp.Height + min(step, 0)
+        if low <= 0:
+            return None
+        footprint = cut.fuse(border)
+        if step == 0:
+            footprint = footprint.removeSplitter()
+        base = Part.Shell(footprint.Faces).extrude(normal * low)
+        prisms = [base]
+        if step != 0:
+            z = footprint.BoundBox.ZMin + low * normal.z
+            tops = [f for f in base.Faces if abs(f.BoundBox.ZMin - z) < 1e-7 and abs(f.BoundBox.ZMax - z) < 1e-7]
+            #the ring goes up if the border is higher, otherwise the grid does
+            higher = [f for f in tops if border.isInside(self.innerPoint(f) - normal * low, 1e-6, True) == (step > 0)]
+            if not higher:
+                return None
+            prisms.append(Part.Shell(higher).extrude(normal * abs(step)))
+        count = collections.Counter()
+        faces = {}
+        for prism in prisms:
+            for solid in prism.Solids:
+                for face in solid.Faces:
+                    count[face.hashCode()] += 1
+                    faces.setdefault(face.hashCode(), face)
+        return Part.Solid(Part.Shell([face for key, face in faces.items() if count[key] == 1]))
+
+    def makeSolid(self, fp, cut, border):
+        '''extrudes the cut grid by Height and adds the border extruded by Height + BorderHeightOffset,
+        merged in 2D when possible, otherwise with a 3D fuse, a wrapped grid is thickened into a sleeve instead'''
+        if self.wrapRadius(fp) > 0:
+            return self.profiled(fp, "sleeve", lambda: self.makeSleeve(fp, cut))
+        if hasattr(cut,"Face1"):
+            normal = cut.Face1.normalAt(0,0).normalize()
         else:
-            if fp.Width >= fp.Length:
-                ellipse = Part.Ellipse(FreeCAD.Vector(0,0,0),fp.Width/2,fp.Length/2).toShape()
+            normal = FreeCAD.Vector(0,0,1)
+        if border is None:
+            return self.profiled(fp, "extrude", lambda: cut.extrude(normal * fp.Height))
+        try:
+            merged = self.profiled(fp, "border merge", lambda: self.mergeBorder(fp, cut, border, normal))
+        except Part.OCCError:
+            merged = None
+        if merged is not None and merged.isValid():
+            return merged
+        cut = self.profiled(fp, "extrude", lambda: cut.extrude(normal * fp.Height))
+        border = border.extrude(border.Face1.normalAt(0,0).normalize()*(fp.Height + fp.BorderHeightOffset))
+        fuse = self.profiled(fp, "border fuse", lambda: border.fuse(cut))
+        return fuse
+
+    def wrapRadius(self, fp):
+        return fp.WrapRadius if hasattr(fp,"WrapRadius") else 0
+
+    def wrapBand(self, fp):
+        '''(vmin, vmax, ymin, ymax): the axial extent of the sleeve and of its perforated part,
+        the rest are the border rings'''
+        b = fp.BorderOffset
+        if b >= 0:
+            return (-b, fp.Length + b, 0, fp.Length)
+        return (0, fp.Length, -b, fp.Length + b)
+
+    def wrapLattice(self, fp):
+        '''lattice stage of a wrapped grid, returns (None, lattice) for cutOutline with the centres
+        in (arc length, z) coordinates of the cylinder'''
+        centres = HoneycombLattice.wrapCentres(fp.Radius, fp.Separation, 2 * math.pi * fp.WrapRadius, fp.Length, fp.SquareGrid,
+                                               fp.XAdjust, fp.YAdjust, getattr(fp,"CountXAdjust",0), getattr(fp,"CountYAdjust",0))
+        if fp.SquareGrid:
+            template = self.makeCross(fp, fp.Radius, FreeCAD.Vector(0,0,0))
+            radius = fp.Radius * math.sqrt(2)
+        else:
+            template = self.makeHexagon(fp, fp.Radius, FreeCAD.Vector(0,0,0))
+            radius = fp.Radius
+        return (None, (template, centres, self.cellRadius(fp, template, radius), self.cellScales(fp, centres)))
+
+    def wrapOutline(self, template, deflection):
+        '''outer wire of template as a clockwise list of (K, 2) point arrays, one per edge, the two ends of
+        a straight edge, otherwise points along it at deflection'''
+        wire = template.OuterWire if template.ShapeType == "Face" else template.Wires[0]
+        edges = []
+        for edge in wire.OrderedEdges:
+            if isinstance(edge.Curve, (Part.Line, Part.LineSegment)):
+                edges.append(np.array([(v.X, v.Y) for v in (edge.firstVertex(), edge.lastVertex())]))
             else:
-                ellipse = Part.Ellipse(FreeCAD.Vector(0,0,0),fp.Length/2,fp.Width/2)
-                plm = FreeCAD.Placement()
-                plm.Rotation = FreeCAD.Rotation(FreeCAD.Vector(0,0,1),90)
-                ellipse.rotate(plm)
-                ellipse = ellipse.toShape()
-            ellipse_face = Part.makeFace(ellipse,"Part::FaceMakerCheese")
-            hex_faces.translate(ellipse_face.BoundBox.Center - hex_faces.BoundBox.Center + FreeCAD.Vector(fp.XAdjust, fp.YAdjust, 0))
-            cut = ellipse_face.cut(hex_faces)
-            if hasattr(cut,"Face1"):
-                normal = cut.Face1.normalAt(0,0).normalize()
+                edges.append(np.array([(v.x, v.y) for v in edge.discretize(Deflection = deflection)]))
+        #edges follow each other along the wire, but each one runs in its own direction
+        gap = lambda a, b: math.hypot(*(a - b))
+        if len(edges) > 1 and min(gap(edges[0][0], edges[1][0]), gap(edges[0][0], edges[1][-1])) < min(gap(edges[0][-1], edges[1][0]), gap(edges[0][-1], edges[1][-1])):
+            edges[0] = edges[0][::-1]
+        outline = edges[:1]
+        for pts in edges[1:]:
+            outline.append(pts if gap(pts[0], outline[-1][-1]) <= gap(pts[-1], outline[-1][-1]) else pts[::-1])
+        ring = np.concatenate(outline)
+        if (ring[:, 0] * np.roll(ring[:, 1], -1) - np.roll(ring[:, 0], -1) * ring[:, 1]).sum() > 0:
+            outline = [pts[::-1] for pts in outline[::-1]]
+        return outline
+
+    def wrapWire(self, surface, outline, x, y, scale = 1, reverse = False):
+        '''wire of outline scaled by scale and placed at (x, y) made of 2D curves on the cylinder surface,
+        u = x / radius, v = y, straight edges become exact lines in (u, v), so the cell is wrapped without any projection'''
+        edges = []
+        for pts in (outline if not reverse else [pts[::-1] for pts in outline[::-1]]):
+            uv = [FreeCAD.Base.Vector2d((x + scale * px) / surface.Radius, y + scale * py) for px, py in pts.tolist()]
+            if len(uv) == 2:
+                curve = Part.Geom2d.Line2dSegment(uv[0], uv[1])
             else:
-                normal = FreeCAD.Vector(0,0,1)
-            cut = cut.extrude(normal * fp.Height)
-            if fp.BorderOffset == 0:
-                return cut
+                curve = Part.Geom2d.BSplineCurve2d()
+                curve.interpolate(uv)
+            edges.append(curve.toShape(surface))
+        return Part.Wire(edges)
+
+    def cutWrapped(self, fp, lattice):
+        '''perforated cylindrical face of a wrapped grid: cells inside the band are added as holes made on the
+        cylinder surface, only cells crossing the ends or the seam go through the boolean cut'''
+        template, centres, cellRadius, scales = lattice
+        if scales is None:
+            scales = np.ones(len(centres))
+        circumference = 2 * math.pi * fp.WrapRadius
+        vmin, vmax, ymin, ymax = self.wrapBand(fp)
+        surface = Part.Cylinder()
+        surface.Radius = fp.WrapRadius
+        band = surface.toShape(0, 2 * math.pi, vmin, vmax)
+        ys = centres[:, 1]
+        radii = cellRadius * scales
+        flags = HoneycombLattice.classifyCells(np.maximum(ymin - ys, ys - ymax), radii)
+        seam = (centres[:, 0] < radii) | (centres[:, 0] > circumference - radii)
+        flags[seam & (flags == HoneycombLattice.CELL_INSIDE)] = HoneycombLattice.CELL_BOUNDARY
+        outline = self.wrapOutline(template, max(cellRadius * 0.01, 1e-4))
+        holes = np.column_stack((centres, scales))[flags == HoneycombLattice.CELL_INSIDE]
+        boundary = np.column_stack((centres, scales))[flags == HoneycombLattice.CELL_BOUNDARY]
+        if len(holes):
+            band.cutHoles([self.wrapWire(surface, outline, x, y, scale) for x, y, scale in holes.tolist()])
+        if len(boundary):
+            tools = []
+            for x, y, scale in boundary.tolist():
+                tool = Part.Face(surface, self.wrapWire(surface, outline, x, y, scale, reverse = True))
+                tool.validate()
+                tools.append(tool)
+            band = self.profiled(fp, "boolean cut", lambda: band.cut(Part.makeCompound(tools)))
+        return band
+
+    def makeSleeve(self, fp, cut):
+        '''thickens the perforated cylindrical face by Height outwards, the cell walls come out radial,
+        then adds or removes the step of BorderHeightOffset on the border rings'''
+        face = cut.Faces[0]
+        u0, u1, v0, v1 = face.ParameterRange
+        point = face.valueAt((u0 + u1) / 2, (v0 + v1) / 2)
+        outwards = face.normalAt((u0 + u1) / 2, (v0 + v1) / 2).dot(FreeCAD.Vector(point.x, point.y, 0)) > 0
+        sleeve = Part.Shell(cut.Faces).makeOffsetShape(fp.Height if outwards else -fp.Height, 1e-7, fill = True)
+        step = fp.BorderHeightOffset
+        if fp.BorderOffset == 0 or step == 0:
+            return sleeve
+        vmin, vmax, ymin, ymax = self.wrapBand(fp)
+        outer = fp.WrapRadius + fp.Height + max(step, 0)
+        inner = max(fp.WrapRadius + fp.Height + min(step, 0), fp.WrapRadius)
+        rings = []
+        for lo, hi in ((vmin, ymin), (ymax, vmax)):
+            if hi > lo:
+                base = FreeCAD.Vector(0, 0, lo)
+                rings.append(Part.makeCylinder(outer, hi - lo, base).cut(Part.makeCylinder(inner, hi - lo, base)))
+        if not rings:
+            return sleeve
+        return sleeve.fuse(rings) if step > 0 else sleeve.cut(rings)
+
+    def handleElliptical(self, fp, hex_faces, lattice = None):
+        '''cuts the grid out of the outline, extrudes it and adds the border'''
+        return self.makeSolid(fp, self.cutOutline(fp, hex_faces, lattice), self.makeBorder(fp))
+
+    def estimateCells(self, fp):
+        width, length = self.extent(fp)
+        if self.wrapRadius(fp) > 0:
+            return HoneycombLattice.wrapCells(fp.Radius, fp.Separation, width, length, fp.SquareGrid,
+                                              getattr(fp,"CountXAdjust",0), getattr(fp,"CountYAdjust",0))
+        return HoneycombLattice.estimateCells(fp.Radius, fp.Separation, width, length, fp.SquareGrid,
+                                              getattr(fp,"CountXAdjust",0), getattr(fp,"CountYAdjust",0))
+
+    def checkCells(self, fp):
+        '''refuses to build a grid of more than MaxCells cells, before any geometry is made'''
+        cells = self.estimateCells(fp)
+        if hasattr(fp,"MaxCells") and fp.MaxCells > 0 and cells > fp.MaxCells:
+            raise Exception(f"Honeycomb: {fp.Label} would have {cells} cells, more than MaxCells = {fp.MaxCells}, increase Radius or MaxCells\n")
+
+    def isDraft(self, fp):
+        '''True if this recompute makes the draft instead of the grid, Auto drafts only with the GUI up,
+        so FreeCADCmd and batch exports always get the full grid'''
+        mode = fp.DraftMode if hasattr(fp,"DraftMode") else "Full"
+        if getattr(self, "full", False):
+            return False
+        if mode != "Auto":
+            return mode == "Draft"
+        if not FreeCAD.GuiUp:
+            return False
+        cells = self.estimateCells(fp)
+        if cells > fp.DraftCells:
+            FreeCAD.Console.PrintMessage(f"Honeycomb: {fp.Label} drafted, {cells} cells is more than DraftCells, use Build full geometry in the context menu or set DraftMode to Full\n")
+            return True
+        return self.inEdit(fp)
+
+    def inEdit(self, fp):
+        '''True if fp or its Profile or Outline is in edit, editing anything else leaves the grid alone'''
+        guiDoc = FreeCADGui.getDocument(fp.Document.Name)
+        editing = guiDoc.getInEdit() if guiDoc else None
+        if editing is None or not hasattr(editing,"Object"):
+            return False
+        return editing.Object in (fp, getattr(fp,"Profile",None), getattr(fp,"Outline",None))
+
+    def background(self, fp):
+        '''True if the grid is built in a background worker, needs the GUI event loop'''
+        return FreeCAD.GuiUp and hasattr(fp,"Background") and fp.Background
+
+    def scheduleBackground(self, fp, solidKey):
+        '''(re)starts the debounce timer of the background build of solidKey, the build of an older key
+        is abandoned, its result is ignored when it arrives'''
+        from PySide import QtCore
+        if getattr(self, "backgroundKey", None) == solidKey:
+            return #already waiting for this one
+        self.backgroundKey = solidKey
+        if getattr(self, "backgroundTimer", None) is None:
+            self.backgroundTimer = QtCore.QTimer()
+            self.backgroundTimer.setSingleShot(True)
+            self.backgroundTimer.timeout.connect(lambda: self.startBackground(fp))
+        self.backgroundTimer.start(max(fp.BackgroundDelay, 0))
+
+    def startBackground(self, fp):
+        '''submits the build of backgroundKey to the worker pool and polls it from the GUI event loop'''
+        from PySide import QtCore
+        key = self.backgroundKey
+        if key is None:
+            return
+        future = HoneycombBackground.submit(HoneycombBackground.makeJob(fp, GEOMETRY + ("GradingMap", "DiskCache", "TileWorkers", "MaxCells")))
+        FreeCAD.Console.PrintMessage(f"Honeycomb: building {fp.Label} in the background, use Cancel background recompute in the context menu to stop\n")
+        poll = QtCore.QTimer()
+        poll.timeout.connect(lambda: self.pollBackground(fp, key, future, poll))
+        poll.start(200)
+        self.backgroundPoll = poll
+
+    def pollBackground(self, fp, key, future, poll):
+        if not future.done():
+            if key != self.backgroundKey:
+                future.cancel() #stale, frees the worker if it has not started yet
+            return
+        poll.stop()
+        if key != self.backgroundKey or future.cancelled():
+            return
+        self.backgroundKey = None
+        try:
+            shape = HoneycombTiles.shapeFromBrep(future.result())
+        except Exception as e:
+            FreeCAD.Console.PrintError(f"Honeycomb: background build of {fp.Label} failed ({e})\n")
+            return
+        if not hasattr(self, "stages"):
+            self.stages = {}
+        self.stages["solid"] = (key, shape)
+        fp.touch()
+        fp.Document.recompute()
+
+    def cancelBackground(self):
+        '''abandons the background build, the draft stays until the next recompute'''
+        self.backgroundKey = None
+        if getattr(self, "backgroundTimer", None) is not None:
+            self.backgroundTimer.stop()
+        HoneycombBackground.cancel()
+
+    def makeDraft(self, fp, border):
+        '''cheap stand-in for the solid without any boolean: the outline extruded as a slab, or with
+        DraftStyle Outline only its outer wire extruded, in a compound with the extruded border
+        a wrapped grid drafts as a plain tube, or with DraftStyle Outline as its inner cylindrical face
+        with a BaseFeature the draft is always a slab, the solid the Body goes on with'''
+        outlineStyle = hasattr(fp,"DraftStyle") and fp.DraftStyle == "Outline" and not (hasattr(fp,"BaseFeature") and fp.BaseFeature)
+        if self.wrapRadius(fp) > 0:
+            vmin, vmax, ymin, ymax = self.wrapBand(fp)
+            base = FreeCAD.Vector(0, 0, vmin)
+            inner = Part.makeCylinder(fp.WrapRadius, vmax - vmin, base)
+            if outlineStyle:
+                return inner.Faces[0]
+            return Part.makeCylinder(fp.WrapRadius + fp.Height, vmax - vmin, base).cut(inner)
+        outline = self.makeOutline(fp)
+        if self.outlineKind(fp) == "rectangle":
+            outline = outline.copy()
+            outline.translate(-outline.BoundBox.Center)
+        normal = outline.normalAt(0,0).normalize()
+        if outlineStyle:
+            field = outline.OuterWire.extrude(normal * fp.Height)
+        else:
+            field = outline.extrude(normal * fp.Height)
+        if border is None:
+            return field
+        return Part.makeCompound([field, border.extrude(border.Face1.normalAt(0,0).normalize()*(fp.Height + fp.BorderHeightOffset))])
+
+    def unitPolygon(self, fp, segments = 24):
+        '''(K, 2) array of the cell outline at radius 1, the Profile outer wire discretized in segments points'''
+        prepared = self.profileTemplate(fp)
+        if prepared is None:
+            unit = HoneycombLattice.SQUARE if fp.SquareGrid else HoneycombLattice.HEXAGON
+        else:
+            unit = np.array([(v.x, v.y) for v in prepared.OuterWire.discretize(segments)])
+        return unit[:-1] if len(unit) > 1 and (unit[0] == unit[-1]).all() else unit
+
+    def outlinePolygon(self, fp, segments = 128):
+        '''(K, 2) array of the outline of the grid in the coordinates of the solid'''
+        if self.outlineKind(fp) == "outline":
+            pts = np.array([(v.x, v.y) for v in self.linkedOutline(fp).OuterWire.discretize(segments)])
+            return pts[:-1] if np.allclose(pts[0], pts[-1]) else pts
+        if not fp.EllipticalGrid:
+            w, l = fp.Width / 2, fp.Length / 2
+            return np.array([(-w, -l), (w, -l), (w, l), (-w, l)])
+        t = np.linspace(0, 2 * math.pi, segments, endpoint = False)
+        return np.column_stack((fp.Width / 2 * np.cos(t), fp.Length / 2 * np.sin(t)))
+
+    def cellPolygons(self, fp):
+        '''(N, K, 2) array of the cells that meet the outline as polygons in the coordinates of the solid,
+        vertices outside a rectangle or ellipse pulled onto it, computed with numpy only for the Cells display mode'''
+        unit = self.unitPolygon(fp)
+        kind = self.outlineKind(fp)
+        width, length = self.extent(fp)
+        if self.wrapRadius(fp) > 0:
+            return self.wrapPolygons(fp, unit, width, length)
+        lattice = HoneycombLattice.squareCentres if fp.SquareGrid else HoneycombLattice.honeycombCentres
+        centres = lattice(fp.Radius, fp.Separation, width, length, fp.XAdjust, fp.YAdjust,
+                          getattr(fp,"CountXAdjust",0), getattr(fp,"CountYAdjust",0))
+        if not len(centres):
+            return np.zeros((0, len(unit), 2))
+        scales = self.cellScales(fp, centres)
+        cellRadius = fp.Radius * np.hypot(unit[:, 0], unit[:, 1]).max()
+        a, b = fp.Width / 2, fp.Length / 2
+        if kind != "rectangle":
+            xmin, ymin, xmax, ymax = HoneycombLattice.latticeBounds(centres, tuple(fp.Radius * unit.min(axis = 0)) + tuple(fp.Radius * unit.max(axis = 0)))
+            centres = centres - ((xmin + xmax) / 2, (ymin + ymax) / 2) + (fp.XAdjust, fp.YAdjust)
+        if kind == "outline":
+            outline = self.linkedOutline(fp)
+            centres = centres + (outline.BoundBox.Center.x, outline.BoundBox.Center.y)
+            distance = self.outlineDistance(outline, cellRadius)(centres[:, 0], centres[:, 1])
+        elif kind == "ellipse":
+            distance = HoneycombLattice.ellipseDistance(centres[:, 0], centres[:, 1], a, b)
+        else:
+            centres = centres - (a - fp.Radius, b)
+            distance = HoneycombLattice.rectangleDistance(centres[:, 0], centres[:, 1], -a, -b, a, b)
+        polygons = self.keptCells(fp, unit, centres, distance, cellRadius, scales)
+        if kind == "outline":
+            return polygons
+        if fp.EllipticalGrid:
+            scale = np.sqrt((polygons[..., 0] / a) ** 2 + (polygons[..., 1] / b) ** 2)
+            polygons = polygons / np.maximum(scale, 1)[..., None]
+        else:
+            polygons = np.clip(polygons, (-a, -b), (a, b))
+        return polygons
+
+    def keptCells(self, fp, unit, centres, distance, cellRadius, scales):
+        '''cell polygons of the centres that are not outside the outline, each scaled by its grading scale'''
+        if scales is None:
+            keep = HoneycombLattice.classifyCells(distance, cellRadius) != HoneycombLattice.CELL_OUTSIDE
+            return HoneycombLattice.cellVertices(centres[keep], fp.Radius, unit)
+        keep = HoneycombLattice.classifyCells(distance, cellRadius * scales) != HoneycombLattice.CELL_OUTSIDE
+        return HoneycombLattice.cellVertices(centres[keep], fp.Radius * scales[keep][:, None, None], unit)
+
+    def wrapPolygons(self, fp, unit, circumference, length):
+        '''cellPolygons of a wrapped grid, in (arc length, z) coordinates, cells crossing the ends cut to them'''
+        centres = HoneycombLattice.wrapCentres(fp.Radius, fp.Separation, circumference, length, fp.SquareGrid,
+                                               fp.XAdjust, fp.YAdjust, getattr(fp,"CountXAdjust",0), getattr(fp,"CountYAdjust",0))
+        vmin, vmax, ymin, ymax = self.wrapBand(fp)
+        cellRadius = fp.Radius * np.hypot(unit[:, 0], unit[:, 1]).max()
+        distance = np.maximum(ymin - centres[:, 1], centres[:, 1] - ymax)
+        polygons = self.keptCells(fp, unit, centres, distance, cellRadius, self.cellScales(fp, centres))
+        polygons[..., 1] = np.clip(polygons[..., 1], ymin, ymax)
+        return polygons
+
+    def wrapPoints(self, fp, points, radius):
+        '''(N, 3) array of (arc length, z) points wrapped around the cylinder at radius'''
+        angle = points[:, 0] / fp.WrapRadius
+        return np.column_stack((radius * np.cos(angle), radius * np.sin(angle), points[:, 1]))
+
+    def splitBase(self, base, bb):
+        '''(touching, untouched) solids of base, by whether their bounding box meets bb'''
+        touching = []
+        untouched = []
+        for solid in base.Solids or [base]:
+            if solid.BoundBox.intersect(bb):
+                touching.append(solid)
             else:
-                if fp.Width >= fp.Length:
-                    ellipse_offset = Part.Ellipse(FreeCAD.Vector(0,0,0),fp.Width / 2 + fp.BorderOffset, fp.Length / 2 + fp.BorderOffset).toShape()
-                else:
-                    ellipse_offset = Part.Ellipse(FreeCAD.Vector(0,0,0),fp.Length / 2 + fp.BorderOffset, fp.Width / 2 + fp.BorderOffset)
-                    ellipse_offset.rotate(plm)
-                    ellipse_offset = ellipse_offset.toShape()
-                ellipse_offset_face = Part.makeFace(ellipse_offset,"Part::FaceMakerCheese")
-                if fp.BorderOffset > 0:
-                    border = ellipse_offset_face.cut(ellipse_face)
-                else:
-                    border = ellipse_face.cut(ellipse_offset_face)
-                border = border.extrude(border.Face1.normalAt(0,0).normalize()*(fp.Height + fp.BorderHeightOffset))
-                fuse = border.fuse(cut)
-                return fuse
+                untouched.append(solid)
+        return (touching, untouched)
+
+    def fuseBase(self, fp, shape, base):
+        '''fuses shape with the solids of the BaseFeature shape base whose bounding box meets it, the other
+        solids are added to the result unchanged, so the boolean only sees the solids in the overlap,
+        a draft is fused like the grid so later features in the Body see one solid, returns the result in body coordinates'''
+        bb = shape.BoundBox
+        bb.enlarge(1e-6)
+        touching, untouched = self.splitBase(base, bb)
+        fused = shape.fuse(touching) if touching else shape
+        full_shape = Part.makeCompound([fused] + untouched) if untouched else fused
+        full_shape.transformShape(fp.Placement.inverse().toMatrix(),True)
+        return full_shape
+
+    def cached(self, stage, key, build):
+        '''returns the result of stage from the last recompute if it was built from the same key,
+        otherwise calls build() and keeps its result for the next recompute'''
+        if not hasattr(self, "stages"):
+            self.stages = {}
+        entry = self.stages.get(stage)
+        self.hit = bool(entry and entry[0] == key)
+        if self.hit:
+            return entry[1]
+        result = build()
+        self.stages[stage] = (key, result)
+        return result
+
+    def shared(self, stage, key, build):
+        '''result of stage from shapeCache, so Honeycomb objects with the same parameters build it only once
+        the results are shared, so they must never be modified in place'''
+        hits = shapeCache.hits
+        result = shapeCache.get((stage, key), build)
+        self.hit = shapeCache.hits > hits
+        return result
+
+    def isCached(self, stage, key):
+        entry = getattr(self, "stages", {}).get(stage)
+        return bool(entry and entry[0] == key)
+
+    def profiled(self, fp, stage, build):
+        '''calls build() and, if fp.Profiling is True, records wall time, cell count, topology size
+        of the result and memory for stage, times include any stages nested inside
+        the process peak only ever grows, so the stage is given how much it raised it, 0 if it stayed below
+        the peak of an earlier stage, next to the process peak itself'''
+        if not (hasattr(fp,"Profiling") and fp.Profiling):
+            return build()
+        self.hit = False
+        memory = peakMemory()
+        start = time.perf_counter()
+        result = build()
+        elapsed = time.perf_counter() - start
+        peak = peakMemory()
+        faces, edges, vertexes = topologySize(result[0] if isinstance(result, tuple) else result)
+        self.profile.append({"stage": stage, "time": round(elapsed, 6), "cached": self.hit, "cells": getattr(self, "cells", None),
+                             "faces": faces, "edges": edges, "vertexes": vertexes,
+                             "peak_growth_kb": None if peak is None else peak - memory, "process_peak_kb": peak})
+        return result
+
+    def reportProfile(self, fp):
+        '''writes the recorded stages to ProfileReport and as one json line to the report view'''
+        if not (hasattr(fp,"Profiling") and fp.Profiling):
+            return
+        stats = shapeCache.stats()
+        fp.ProfileReport = [", ".join(f"{k}: {v}" for k, v in entry.items()) for entry in self.profile + [dict(stage = "shape cache", **stats)]]
+        FreeCAD.Console.PrintMessage("Honeycomb profile " + json.dumps({"object": fp.Name, "stages": self.profile, "shape_cache": stats}) + "\n")
+
+    def geometryInputs(self, fp):
+        '''every input the solid depends on, for the on-disk cache key, the Profile by the hash of its BREP
+        because Shape.hashCode() changes between sessions'''
+        profile = HoneycombCache.shapeHash(fp.Profile.Shape) if hasattr(fp,"Profile") and fp.Profile and hasattr(fp.Profile,"Shape") else None
+        inputs = {name: getattr(fp, name) for name in GEOMETRY if hasattr(fp, name)}
+        grading = self.gradingKey(fp)
+        inputs.update({"Profile": profile, "Outline": self.outlineHash(fp), "GradingMap": grading and grading[-1], "macro": __version__})
+        return inputs
+
+    def diskCached(self, fp, build):
+        '''if DiskCache or ParametersOnly is True, loads the solid from the on-disk cache, or calls build() and stores its result there'''
+        if not (getattr(fp,"DiskCache",False) or getattr(fp,"ParametersOnly",False)):
+            return build()
+        key = HoneycombCache.makeKey(self.geometryInputs(fp))
+        shape = self.profiled(fp, "disk cache", lambda: HoneycombCache.load(key))
+        if shape is None:
+            shape = build()
+            HoneycombCache.store(key, shape)
+        return shape
+
+    def buildFaces(self, fp, latticeKey, cutKey, borderKey):
+        '''lattice, cut and border stages, returns (cut, border) 2D faces'''
+        grid = self.profiled(fp, "lattice", lambda: self.cached("lattice", latticeKey, lambda: self.shared("lattice", latticeKey, lambda: self.makeGrid(fp))))
+        cut = self.profiled(fp, "cut", lambda: self.cached("cut", cutKey, lambda: self.shared("cut", cutKey, lambda: self.cutOutline(fp, *grid))))
+        border = self.profiled(fp, "border", lambda: self.cached("border", borderKey, lambda: self.shared("border", borderKey, lambda: self.makeBorder(fp))))
+        return (cut, border)
+
+    def makeGrid(self, fp):
+        '''lattice stage, (faces, lattice) of the wrapped, square or hexagon grid'''
+        if self.wrapRadius(fp) > 0:
+            return self.wrapLattice(fp)
+        return self.crossLattice(fp) if fp.SquareGrid else self.honeycombLattice(fp)
+
+    def buildSolid(self, fp, latticeKey, cutKey, borderKey):
+        '''the solid made of the lattice, cut and border stages'''
+        return self.makeSolid(fp, *self.buildFaces(fp, latticeKey, cutKey, borderKey))
+
+    def makeMesh(self, fp, tolerance = 0.05):
+        '''(vertices, triangles) numpy arrays of a watertight mesh of the honeycomb in its placement, without the BaseFeature
+        only the 2D faces are triangulated, the prism is made by HoneycombMesh, so no 3D boolean or extrusion is done'''
+        self.checkCells(fp)
+        latticeKey, cutKey, borderKey, solidKey = self.stageKeys(fp)
+        if self.wrapRadius(fp) > 0:
+            #a sleeve is no prism, its solid is tessellated and welded instead
+            points, triangles = self.buildSolid(fp, latticeKey, cutKey, borderKey).tessellate(tolerance)
+            vertices, index = HoneycombMesh.weld([(p.x, p.y, p.z) for p in points])
+            return (HoneycombMesh.transform(vertices, fp.Placement.toMatrix().A), index[np.array(triangles, dtype = np.int64)])
+        cut, border = self.buildFaces(fp, latticeKey, cutKey, borderKey)
+        #ring and grid as faces of one shape share their edges, so both get the same points along them
+        shape = cut if border is None else cut.fuse(border)
+        shape.tessellate(tolerance)
+        pieces = []
+        for face in shape.Faces:
+            points, triangles = face.tessellate(tolerance)
+            if not triangles:
+                continue
+            height = fp.Height
+            if border is not None:
+                centre = (points[triangles[0][0]] + points[triangles[0][1]] + points[triangles[0][2]]) * (1.0 / 3)
+                if border.isInside(centre, 1e-6, True):
+                    height += fp.BorderHeightOffset
+            pieces.append(([(p.x, p.y) for p in points], triangles, height))
+        vertices, triangles = HoneycombMesh.prismMesh(pieces)
+        return (HoneycombMesh.transform(vertices, fp.Placement.toMatrix().A), triangles)
+
+    def exportMesh(self, fp, path, tolerance = 0.05):
+        '''writes the mesh of makeMesh to path, STL directly, other formats (obj, ply, 3mf...) through the Mesh module'''
+        self.profile = []
+        vertices, triangles = self.profiled(fp, "mesh", lambda: self.makeMesh(fp, tolerance))
+        if path.lower().endswith(".stl"):
+            HoneycombMesh.writeStl(path, vertices, triangles)
+        else:
+            self.meshOf(vertices, triangles).write(path)
+        self.reportProfile(fp)
+
+    def makeMeshFeature(self, fp, tolerance = 0.05):
+        '''adds a Mesh::Feature with the mesh of makeMesh to the document of fp'''
+        mesh = self.meshOf(*self.makeMesh(fp, tolerance))
+        feature = fp.Document.addObject("Mesh::Feature", fp.Name + "Mesh")
+        feature.Mesh = mesh
+        return feature
+
+    def meshOf(self, vertices, triangles):
+        import Mesh
+        return Mesh.Mesh(([FreeCAD.Vector(*v) for v in vertices.tolist()], [tuple(t) for t in triangles.tolist()]))
+
+    def latticeKey(self, fp):
+        '''the properties the lattice stage reads, the Profile by the hash of its BREP because the
+        lattice is shared through shapeCache and hashCode() may be reused once a shape is freed'''
+        profile = HoneycombCache.shapeHash(fp.Profile.Shape) if hasattr(fp,"Profile") and fp.Profile and hasattr(fp.Profile,"Shape") else None
+        return (fp.SquareGrid, fp.Radius, fp.Separation, fp.Width, fp.Length, fp.XAdjust, fp.YAdjust,
+                getattr(fp,"CountXAdjust",0), getattr(fp,"CountYAdjust",0), self.useLattice(fp), self.gradingKey(fp), profile, self.outlineHash(fp), self.wrapRadius(fp))
+
+    def stageKeys(self, fp):
+        '''(latticeKey, cutKey, borderKey, solidKey), the properties each stage reads'''
+        latticeKey = self.latticeKey(fp)
+        cutKey = (latticeKey, fp.EllipticalGrid, getattr(fp,"BoundaryCut",False), self.tiles(fp), self.strips(fp))
+        borderKey = (fp.EllipticalGrid, fp.Width, fp.Length, fp.BorderOffset, latticeKey[-2], latticeKey[-1])
+        solidKey = (cutKey, borderKey, fp.Height, fp.BorderHeightOffset)
+        return (latticeKey, cutKey, borderKey, solidKey)
 
     def execute(self,fp):
         if not hasattr(fp, "SquareGrid"):
             fp.addProperty("App::PropertyBool","SquareGrid","Honeycomb","Whether to make honeycomb grid or square grid").SquareGrid = False
-        shape = self.makeHoneycomb(fp) if not fp.SquareGrid else self.makeCrossGrid(fp)
+        self.profile = []
+        #counted up front, the lattice stage is skipped on a hit in the stage, shape or disk cache
+        self.cells = self.estimateCells(fp) if getattr(fp,"Profiling",False) else None
+        #each stage is rebuilt only when the properties it reads have changed since the last recompute
+        #the on-disk cache sits below the solid stage, so a hit there skips the lattice, cut and border stages too
+        latticeKey, cutKey, borderKey, solidKey = self.stageKeys(fp)
+        if self.background(fp) and getattr(fp,"DraftMode","Full") != "Draft" and not getattr(self, "full", False):
+            #the worker always builds the full grid, whatever Auto would say, and the draft is shown
+            #only until its solid arrives in the stage cache
+            draft = not self.isCached("solid", solidKey)
+            if draft:
+                self.checkCells(fp)
+                self.scheduleBackground(fp, solidKey)
+            else:
+                self.backgroundKey = None
+        else:
+            draft = self.isDraft(fp)
+            if not draft:
+                self.checkCells(fp)
+                self.backgroundKey = None #a pending background build is stale now
+        self.full = False #Build full geometry is good for one recompute
+        if draft:
+            border = self.profiled(fp, "border", lambda: self.cached("border", borderKey, lambda: self.shared("border", borderKey, lambda: self.makeBorder(fp))))
+            shape = self.profiled(fp, "draft", lambda: self.makeDraft(fp, border))
+            solidKey = ("draft", solidKey, getattr(fp,"DraftStyle","Slab"))
+        else:
+            shape = self.profiled(fp, "solid", lambda: self.cached("solid", solidKey, lambda: self.diskCached(fp, lambda: self.buildSolid(fp, latticeKey, cutKey, borderKey))))
         fp.positionBySupport()
-        shape.Placement = fp.Placement
+        shape.Placement = fp.Placement #a Placement or attachment change reuses every stage
 
        #shape.transformShape(fp.Placement.inverse().toMatrix(), True)
         if hasattr(fp,"AddSubShape"):
             fp.AddSubShape = shape
         if hasattr(fp,"BaseFeature") and fp.BaseFeature:
-            full_shape = shape.fuse(fp.BaseFeature.Shape)
-            full_shape.transformShape(fp.Placement.inverse().toMatrix(),True)
+            base = fp.BaseFeature.Shape
+            #by the BREP of base, a hashCode() may be reused by an edited BaseFeature once the old shape is freed
+            fuseKey = (solidKey, tuple(fp.Placement.toMatrix().A), HoneycombCache.shapeHash(base))
+            full_shape = self.profiled(fp, "base feature fuse", lambda: self.cached("base fuse", fuseKey, lambda: self.fuseBase(fp, shape, base)))
             fp.Shape = full_shape
         else:
             fp.Shape = shape
+        if getattr(fp,"ParametersOnly",False):
+            fp.ShapeHash = HoneycombCache.makeKey(self.geometryInputs(fp))
+        self.persistence(fp)
+        self.reportProfile(fp)
+
+    def persistence(self, fp):
+        '''marks Shape and AddSubShape transient when ParametersOnly, so the document saves no B-rep for them'''
+        if not hasattr(fp,"ParametersOnly") or not hasattr(fp,"setPropertyStatus"):
+            return
+        status = "Transient" if fp.ParametersOnly else "-Transient"
+        for prop in ("Shape", "AddSubShape"):
+            if hasattr(fp, prop):
+                fp.setPropertyStatus(prop, status)
+
+    def onChanged(self, fp, prop):
+        if prop == "ParametersOnly":
+            self.persistence(fp)
+
+    def onDocumentRestored(self, fp):
+        '''the status of Shape is not saved, so it is set again, and the empty shape of a parameters only
+        Honeycomb is rebuilt on the next recompute, from the disk cache when the solid is there'''
+        self.persistence(fp)
+        if getattr(fp,"ParametersOnly",False):
+            if hasattr(fp,"enforceRecompute"):
+                fp.enforceRecompute()
+            else:
+                fp.touch()
+
+    def __getstate__(self):
+        '''only fpName is saved with the document, the cached stages are rebuilt on the first recompute
+        and background builds are not resumed'''
+        return {"fpName": self.fpName}
+
+    def __setstate__(self,state):
+        if state:
+            self.fpName = state["fpName"]
+        return None
 
 
 class HoneycombVP:
@@ -204,17 +1127,71 @@ class HoneycombVP:
 
     def attach(self, obj):
         '''Setup the scene sub-graph of the view provider, this method is mandatory'''
+        from pivy import coin
         self.Object = obj.Object
+        #Cells display mode: the top of the plate and every cell drawn from one merged vertex buffer
+        self.cellsNode = coin.SoSeparator()
+        plate = coin.SoSeparator()
+        self.plateMaterial = coin.SoMaterial()
+        self.plateCoords = coin.SoCoordinate3()
+        self.plateFaces = coin.SoFaceSet()
+        for node in (coin.SoPolygonOffset(), self.plateMaterial, self.plateCoords, self.plateFaces): #plate behind the cells
+            plate.addChild(node)
+        cellMaterial = coin.SoMaterial()
+        cellMaterial.diffuseColor.setValue(0.1, 0.1, 0.1)
+        self.cellCoords = coin.SoCoordinate3()
+        self.cellFaces = coin.SoIndexedFaceSet()
+        for node in (plate, cellMaterial, self.cellCoords, self.cellFaces):
+            self.cellsNode.addChild(node)
+        obj.addDisplayMode(self.cellsNode, "Cells")
+
+    def updateCells(self, vobj):
+        '''fills the Cells display mode, only while it is shown, so other modes pay nothing for it'''
+        fp = vobj.Object
+        if vobj.DisplayMode != "Cells" or not hasattr(fp.Proxy, "cellPolygons"):
+            return
+        z = fp.Height
+        wrapped = fp.Proxy.wrapRadius(fp) > 0
+        if wrapped:
+            #the outside of the sleeve as a band of quads
+            vmin, vmax, ymin, ymax = fp.Proxy.wrapBand(fp)
+            x = np.linspace(0, 2 * math.pi * fp.WrapRadius, 65)
+            quads = np.stack((np.column_stack((x[:-1], np.full(64, vmin))), np.column_stack((x[1:], np.full(64, vmin))),
+                              np.column_stack((x[1:], np.full(64, vmax))), np.column_stack((x[:-1], np.full(64, vmax)))), axis = 1)
+            plate = fp.Proxy.wrapPoints(fp, quads.reshape(-1, 2), fp.WrapRadius + z)
+            sizes = [4] * 64
+        else:
+            plate = fp.Proxy.outlinePolygon(fp)
+            plate = np.column_stack((plate, np.full(len(plate), z)))
+            sizes = [len(plate)]
+        self.plateMaterial.diffuseColor.setValue(*vobj.ShapeColor[:3])
+        self.plateCoords.point.setValues(0, len(plate), plate.tolist())
+        self.plateCoords.point.setNum(len(plate))
+        self.plateFaces.numVertices.setValues(0, len(sizes), sizes)
+        self.plateFaces.numVertices.setNum(len(sizes))
+        polygons = fp.Proxy.cellPolygons(fp)
+        n, k = polygons.shape[:2]
+        if wrapped:
+            points = fp.Proxy.wrapPoints(fp, polygons.reshape(-1, 2), fp.WrapRadius + z)
+        else:
+            points = np.concatenate((polygons.reshape(-1, 2), np.full((n * k, 1), z)), axis = 1)
+        index = np.hstack((np.arange(n * k).reshape(n, k), np.full((n, 1), -1))).ravel()
+        self.cellCoords.point.setValues(0, n * k, points.tolist())
+        self.cellCoords.point.setNum(n * k)
+        self.cellFaces.coordIndex.setValues(0, len(index), index.tolist())
+        self.cellFaces.coordIndex.setNum(len(index))
 
     def updateData(self, fp, prop):
         '''If a property of the handled feature has changed we have the chance to handle this here'''
         # fp is the handled feature, prop is the name of the property that has changed
-        pass
+        if prop == "Shape":
+            self.updateCells(fp.ViewObject)
 
     def getDisplayModes(self,obj):
         '''Return a list of display modes.'''
         modes=[]
         modes.append("Flat Lines")
+        modes.append("Cells")
         return modes
 
     def getDefaultDisplayMode(self):
@@ -229,12 +1206,36 @@ class HoneycombVP:
     def onChanged(self, vp, prop):
         '''Here we can do something when a single property got changed'''
         #FreeCAD.Console.PrintMessage("Change property: " + str(prop) + ""+chr(10))
+        if prop in ("DisplayMode", "ShapeColor") and hasattr(self, "cellsNode"):
+            self.updateCells(vp)
 
     def claimChildren(self):
         return []
 
     def setupContextMenu(self, vobj, menu):
-        pass
+        from PySide import QtGui
+        action = QtGui.QAction("Build full geometry", menu)
+        action.triggered.connect(lambda: self.buildFull(vobj.Object))
+        menu.addAction(action)
+        action = QtGui.QAction("Export mesh...", menu)
+        action.triggered.connect(lambda: self.exportMesh(vobj.Object))
+        menu.addAction(action)
+        action = QtGui.QAction("Cancel background recompute", menu)
+        action.triggered.connect(lambda: vobj.Object.Proxy.cancelBackground())
+        menu.addAction(action)
+
+    def exportMesh(self, fp):
+        '''asks for a file and writes the mesh of fp to it'''
+        from PySide import QtGui
+        path = QtGui.QFileDialog.getSaveFileName(None, "Export mesh", fp.Label + ".stl", "Mesh (*.stl *.3mf *.obj *.ply *.off *.amf)")[0]
+        if path:
+            fp.Proxy.exportMesh(fp, path)
+
+    def buildFull(self, fp):
+        '''recomputes fp once with the full grid, whatever its DraftMode'''
+        fp.Proxy.full = True
+        fp.touch()
+        fp.Document.recompute()
 
     def setEdit(self,vp,modNum):
         pass
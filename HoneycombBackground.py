@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+#Honeycomb background -- builds honeycomb solids in a headless FreeCAD worker process so the GUI stays responsive
+#A job is the geometry properties of one Honeycomb and its Profile and Outline as BREP, the result is the solid as BREP.
+#2021, by <TheMarkster> LGPL2.1 or later
+import FreeCAD
+import os, atexit
+import multiprocessing, concurrent.futures
+import HoneycombTiles
+
+_pool = None
+
+def getPool():
+    '''process pool for background builds, kept between recomputes because starting FreeCAD in each worker is slow'''
+    global _pool
+    if _pool is None:
+        context = multiprocessing.get_context("spawn")
+        context.set_executable(HoneycombTiles.pythonExecutable())
+        _pool = concurrent.futures.ProcessPoolExecutor(max_workers = max(1, (os.cpu_count() or 2) // 2), mp_context = context)
+    return _pool
+
+def cancel():
+    '''abandons every pending and running build, the worker processes are killed and started again on the next job'''
+    global _pool
+    if _pool is None:
+        return
+    processes = list(getattr(_pool, "_processes", {}).values())
+    _pool.shutdown(wait = False, cancel_futures = True)
+    for process in processes:
+        process.terminate()
+    _pool = None
+
+atexit.register(cancel)
+
+LINKS = ("Profile", "Outline")
+
+def makeJob(fp, names):
+    '''job for the properties names of fp and the shapes of its links'''
+    links = {}
+    for link in LINKS:
+        obj = getattr(fp, link, None)
+        if obj and hasattr(obj,"Shape"):
+            shape = obj.Shape.copy()
+            if link == "Outline" and obj.isDerivedFrom("Sketcher::SketchObject"):
+                shape.Placement = obj.Placement.inverse().multiply(shape.Placement) #the worker gets a plain shape
+            links[link] = shape.exportBrepToString()
+    return {"properties": {name: getattr(fp, name) for name in names if hasattr(fp, name)}, "links": links}
+
+def buildSolid(job):
+    '''worker: makes the Honeycomb of job in a new document without the GUI, returns its solid as BREP'''
+    import Honeycomb
+    doc = FreeCAD.newDocument("HoneycombBackground")
+    try:
+        fp = doc.addObject("Part::FeaturePython","Honeycomb")
+        Honeycomb.Honeycomb(fp)
+        for name, value in job["properties"].items():
+            setattr(fp, name, value)
+        for link, brep in job["links"].items():
+            obj = doc.addObject("Part::Feature", link)
+            obj.Shape = HoneycombTiles.shapeFromBrep(brep)
+            setattr(fp, link, obj)
+        fp.DraftMode = "Full"
+        fp.Background = False
+        fp.Proxy.execute(fp)
+        shape = fp.Shape.copy()
+        shape.Placement = FreeCAD.Placement()
+        return shape.exportBrepToString()
+    finally:
+        FreeCAD.closeDocument(doc.Name)
+
+def submit(job):
+    '''starts job in the pool, returns its future'''
+    return getPool().submit(buildSolid, job)
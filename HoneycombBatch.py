@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+#Honeycomb batch -- builds Honeycomb panels headless from a CSV or JSON parameter file and exports each one
+#run with: FreeCADCmd HoneycombBatch.py --pass panels.csv [--format step] [--output-dir out] [--jobs 4] [--report report.jsonl]
+#or with the python FreeCAD was built against: python HoneycombBatch.py --freecad-lib /usr/lib/freecad/lib panels.csv ...
+#Every row or object is one panel: Honeycomb property names as keys (Radius, Width, EllipticalGrid...), plus optionally
+#  Name     file name of the result, default honeycomb_<row number>
+#  Format   step, brep or stl, default --format
+#  Profile  path of a BREP or STEP file holding the cell profile
+#  Outline  path of a BREP or STEP file holding a planar face or closed wire to fill instead of Width x Length
+#Each panel is exported as soon as it is built and its document closed before the next one, so memory stays flat.
+#One json line per panel is written to --report (default stdout) with its output file, time and error if any.
+import sys, os, csv, json, time, argparse, multiprocessing, concurrent.futures
+
+FORMATS = {"step": ".step", "brep": ".brep", "stl": ".stl"}
+COLUMNS = ("Name", "Format", "Profile", "Outline")
+
+def parseArgs(argv):
+    if "--pass" in argv:
+        argv = argv[argv.index("--pass") + 1:]
+    else:
+        scripts = [i for i, arg in enumerate(argv) if arg.endswith(".py")]
+        argv = argv[scripts[0] + 1:] if scripts else argv[1:]
+    parser = argparse.ArgumentParser(description = "Build and export Honeycomb panels from a parameter file")
+    parser.add_argument("parameters", help = "csv file with a header row, json list of objects or json lines file")
+    parser.add_argument("--format", default = "step", choices = sorted(FORMATS))
+    parser.add_argument("--output-dir", default = ".")
+    parser.add_argument("--jobs", type = int, default = 1, help = "worker processes, 1 builds the panels in this process")
+    parser.add_argument("--tolerance", type = float, default = 0.05, help = "mesh tolerance for stl")
+    parser.add_argument("--report", default = None, help = "json lines file, default stdout")
+    parser.add_argument("--freecad-lib", default = None, help = "directory containing FreeCAD.so when not run by FreeCADCmd")
+    return parser.parse_args(argv)
+
+def readParameters(path):
+    '''list of dicts, one per panel, values as found in the file (strings for csv)'''
+    with open(path, newline = "") as f:
+        if path.lower().endswith(".csv"):
+            return [dict(row) for row in csv.DictReader(f)]
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+def convert(fp, name, value):
+    '''value of a csv cell or json field as the type of property name'''
+    if not isinstance(value, str):
+        return value
+    kind = fp.getTypeIdOfProperty(name)
+    if "Bool" in kind:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if "Integer" in kind:
+        return int(value)
+    if "Float" in kind or "Length" in kind or "Distance" in kind:
+        return float(value)
+    return value
+
+def buildPanel(job):
+    '''builds and exports one panel, returns its report'''
+    import FreeCAD, Part, Honeycomb
+    index, params, args = job
+    params = {k: v for k, v in params.items() if v not in ("", None)}
+    fmt = str(params.get("Format", args["format"])).lower()
+    name = params.get("Name", f"honeycomb_{index}")
+    result = {"index": index, "name": name, "format": fmt}
+    start = time.perf_counter()
+    doc = FreeCAD.newDocument("HoneycombBatch")
+    try:
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown format {fmt}")
+        fp = doc.addObject("Part::FeaturePython","Honeycomb")
+        Honeycomb.Honeycomb(fp)
+        for key, value in params.items():
+            if key in COLUMNS:
+                continue
+            if key not in fp.PropertiesList:
+                raise KeyError(f"Honeycomb has no property {key}")
+            setattr(fp, key, convert(fp, key, value))
+        for link in ("Profile", "Outline"):
+            if link in params:
+                obj = doc.addObject("Part::Feature", link)
+                obj.Shape = Part.read(params[link])
+                setattr(fp, link, obj)
+        fp.DraftMode = "Full"
+        path = os.path.join(args["output_dir"], name + FORMATS[fmt])
+        if fmt == "stl":
+            #straight from the 2D faces, the solid is never built
+            fp.Proxy.exportMesh(fp, path, args["tolerance"])
+        else:
+            fp.Proxy.execute(fp)
+            if fmt == "step":
+                fp.Shape.exportStep(path)
+            else:
+                fp.Shape.exportBrep(path)
+        result["output"] = path
+        result["cells"] = getattr(fp.Proxy, "cells", None)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        FreeCAD.closeDocument(doc.Name)
+        Honeycomb.shapeCache.clear()
+    result["time"] = round(time.perf_counter() - start, 6)
+    return result
+
+def workerInit(paths):
+    sys.path[:0] = [p for p in paths if p not in sys.path]
+
+def run(rows, args, out):
+    '''builds every row, writing each report as soon as its panel is done, returns the number of failures'''
+    options = {"format": args.format, "output_dir": args.output_dir, "tolerance": args.tolerance}
+    jobs = [(index, row, options) for index, row in enumerate(rows)]
+    failed = 0
+    def report(result):
+        nonlocal failed
+        failed += "error" in result
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+    if args.jobs <= 1:
+        for job in jobs:
+            report(buildPanel(job))
+        return failed
+    import HoneycombTiles, HoneycombBatch #the workers find buildPanel by module name, not as __main__
+    context = multiprocessing.get_context("spawn")
+    context.set_executable(HoneycombTiles.pythonExecutable())
+    #one panel per worker task, so a worker never holds more than the panel it is building
+    with concurrent.futures.ProcessPoolExecutor(max_workers = args.jobs, mp_context = context, initializer = workerInit, initargs = (sys.path[:],)) as pool:
+        futures = {pool.submit(HoneycombBatch.buildPanel, job): job for job in jobs}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                report(future.result())
+            except Exception as e:
+                #a worker killed by a crash in OCC breaks the pool, every panel not yet done fails with it
+                index, params, options = futures[future]
+                report({"index": index, "name": params.get("Name") or f"honeycomb_{index}",
+                        "format": str(params.get("Format") or options["format"]).lower(), "error": f"{type(e).__name__}: {e}"})
+    return failed
+
+def main(argv):
+    args = parseArgs(argv)
+    if args.freecad_lib:
+        sys.path.append(args.freecad_lib)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.makedirs(args.output_dir, exist_ok = True)
+    rows = readParameters(args.parameters)
+    out = open(args.report, "w") if args.report else sys.stdout
+    start = time.perf_counter()
+    try:
+        failed = run(rows, args, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    sys.stderr.write(f"Honeycomb batch: {len(rows) - failed} of {len(rows)} panels built in {time.perf_counter() - start:.1f} s\n")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#Honeycomb benchmark -- times Honeycomb.execute headless across a parameter matrix
+#run with: FreeCADCmd HoneycombBenchmark.py --pass [--cells 100,1000] [--repeat 3] [--output results.jsonl]
+#or with the python FreeCAD was built against: python HoneycombBenchmark.py --freecad-lib /usr/lib/freecad/lib ...
+#writes one json object per configuration and run, in order of increasing cell count
+import sys, os, json, time, math, argparse, itertools
+
+CELL_COUNTS = [100, 1000, 10000, 100000]
+SIZE = 100.0 #Width and Length of every panel, Radius is scaled to reach the cell count
+
+def parseArgs(argv):
+    if "--pass" in argv:
+        argv = argv[argv.index("--pass") + 1:]
+    else:
+        scripts = [i for i, arg in enumerate(argv) if arg.endswith(".py")]
+        argv = argv[scripts[0] + 1:] if scripts else argv[1:]
+    parser = argparse.ArgumentParser(description = "Benchmark Honeycomb.execute across a parameter matrix")
+    parser.add_argument("--cells", default = ",".join(str(c) for c in CELL_COUNTS), help = "comma separated target cell counts")
+    parser.add_argument("--outline", default = "elliptical,rectangular")
+    parser.add_argument("--grid", default = "hexagon,square")
+    parser.add_argument("--cell", default = "builtin,profile")
+    parser.add_argument("--border", default = "on,off")
+    parser.add_argument("--base", default = "off,on", help = "fuse with a BaseFeature")
+    parser.add_argument("--repeat", type = int, default = 1)
+    parser.add_argument("--output", default = None, help = "json lines file, default stdout")
+    parser.add_argument("--freecad-lib", default = None, help = "directory containing FreeCAD.so when not run by FreeCADCmd")
+    return parser.parse_args(argv)
+
+def radiusFor(cells, square):
+    '''circumradius giving about cells cells on a SIZE x SIZE panel, with Separation = Radius / 4'''
+    tan15 = 0.2679491924311227
+    sin60 = 0.8660254037844386
+    if square:
+        #pitch (2 + .25) * r in both directions
+        return SIZE / (2.25 * math.sqrt(cells))
+    #two offset arrays of pitch xInt * yInt
+    pitch = 2 * sin60 * (2 + .25 - tan15) * (2 + .25 - tan15)
+    return SIZE * math.sqrt(2 / (pitch * cells))
+
+def configurations(args):
+    split = lambda text: [t.strip() for t in text.split(",") if t.strip()]
+    matrix = itertools.product([int(c) for c in split(args.cells)], split(args.outline), split(args.grid),
+                               split(args.cell), split(args.border), split(args.base))
+    for cells, outline, grid, cell, border, base in sorted(matrix, key = lambda conf: conf[0]):
+        yield {"target_cells": cells, "outline": outline, "grid": grid, "cell": cell, "border": border, "base": base}
+
+def makeFeature(doc, conf):
+    import FreeCAD, Part, Honeycomb
+    fp = doc.addObject("Part::FeaturePython","Honeycomb")
+    Honeycomb.Honeycomb(fp)
+    square = conf["grid"] == "square"
+    fp.Radius = radiusFor(conf["target_cells"], square)
+    fp.Separation = fp.Radius / 4
+    fp.Width = SIZE
+    fp.Length = SIZE
+    fp.Height = 3
+    fp.EllipticalGrid = conf["outline"] == "elliptical"
+    fp.SquareGrid = square
+    fp.BorderOffset = 1 if conf["border"] == "on" else 0
+    fp.Profiling = True
+    if conf["cell"] == "profile":
+        profile = doc.addObject("Part::Feature","Profile")
+        profile.Shape = Part.Wire(Part.makeCircle(1 if not square else .9))
+        fp.Profile = profile
+    if conf["base"] == "on":
+        #Part::FeaturePython has no BaseFeature, execute fuses with whatever the property links to
+        base = doc.addObject("Part::Feature","Base")
+        base.Shape = Part.makeBox(SIZE * 1.2, SIZE * 1.2, 5, FreeCAD.Vector(-SIZE * .6, -SIZE * .6, -5))
+        fp.addProperty("App::PropertyLink","BaseFeature","Base","Shape to fuse with")
+        fp.BaseFeature = base
+    return fp
+
+def run(conf, run_index):
+    import FreeCAD, Honeycomb
+    #every run builds from scratch, the shared shape cache would otherwise hand over the lattice and cut of the
+    #previous configuration, which differs only in properties those stages do not read
+    Honeycomb.shapeCache.clear()
+    doc = FreeCAD.newDocument("HoneycombBenchmark")
+    result = dict(conf, run = run_index, version = Honeycomb.__version__)
+    try:
+        fp = makeFeature(doc, conf)
+        result["radius"] = fp.Radius
+        memory = Honeycomb.peakMemory()
+        start = time.perf_counter()
+        fp.Proxy.execute(fp)
+        result["time"] = round(time.perf_counter() - start, 6)
+        shape = fp.Shape
+        result["cells"] = getattr(fp.Proxy, "cells", None)
+        result["faces"], result["edges"], result["vertexes"] = Honeycomb.topologySize(shape)
+        result["solids"] = len(shape.Solids)
+        result["valid"] = shape.isValid()
+        result["peak_memory_kb"] = Honeycomb.peakMemory()
+        if memory is not None:
+            result["memory_growth_kb"] = result["peak_memory_kb"] - memory
+        result["stages"] = fp.Proxy.profile
+        result["shape_cache"] = Honeycomb.shapeCache.stats()
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        FreeCAD.closeDocument(doc.Name)
+    return result
+
+def main(argv):
+    args = parseArgs(argv)
+    if args.freecad_lib:
+        sys.path.append(args.freecad_lib)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for conf in configurations(args):
+            for run_index in range(args.repeat):
+                out.write(json.dumps(run(conf, run_index)) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#Honeycomb cache -- on-disk cache of finished honeycomb solids as binary BREP files
+#keyed by a hash of every input that affects the geometry, bounded in size, least recently used files go first
+#Settings (Tools -> Edit parameters, BaseApp/Preferences/Macros/Honeycomb):
+#   DiskCacheDir     folder of the cache, default Honeycomb in the FreeCAD cache folder
+#   DiskCacheSizeMB  size limit of the cache, default 500
+#2021, by <TheMarkster> LGPL2.1 or later
+import FreeCAD, Part
+import os, glob, hashlib, json
+
+PARAMETERS = "User parameter:BaseApp/Preferences/Macros/Honeycomb"
+SUFFIX = ".brp"
+
+def parameters():
+    return FreeCAD.ParamGet(PARAMETERS)
+
+def cacheDir():
+    '''the cache folder, created if needed, None if it cannot be created'''
+    path = parameters().GetString("DiskCacheDir", "")
+    if not path:
+        base = FreeCAD.getUserCachePath() if hasattr(FreeCAD, "getUserCachePath") else FreeCAD.getUserAppDataPath()
+        path = os.path.join(base, "Honeycomb")
+    try:
+        os.makedirs(path, exist_ok = True)
+    except OSError as e:
+        FreeCAD.Console.PrintWarning(f"Honeycomb: disk cache disabled, cannot create {path} ({e})\n")
+        return None
+    return path
+
+def maxBytes():
+    return parameters().GetInt("DiskCacheSizeMB", 500) * 1024 * 1024
+
+def makeKey(inputs):
+    '''hex digest identifying inputs, a json serializable dict of everything the geometry depends on'''
+    return hashlib.sha256(json.dumps(inputs, sort_keys = True).encode()).hexdigest()
+
+def shapeHash(shape):
+    '''hash of the geometry of shape, stable between sessions unlike Shape.hashCode()'''
+    return hashlib.sha256(shape.exportBrepToString().encode()).hexdigest()
+
+def fileHash(path):
+    '''hash of the contents of the file at path'''
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def load(key):
+    '''the cached shape for key, None on a miss'''
+    directory = cacheDir()
+    if directory is None:
+        return None
+    path = os.path.join(directory, key + SUFFIX)
+    if not os.path.isfile(path):
+        return None
+    shape = Part.Shape()
+    try:
+        shape.importBinary(path)
+    except Exception as e:
+        FreeCAD.Console.PrintWarning(f"Honeycomb: removing unreadable cache file {path} ({e})\n")
+        try:
+            os.remove(path)
+        except OSError:
+            pass #removed by another FreeCAD
+        return None
+    try:
+        os.utime(path) #most recently used
+    except OSError:
+        pass
+    return shape
+
+def store(key, shape):
+    '''writes shape to the cache under key, then evicts the least recently used files above the size limit,
+    a failed write only warns, the recompute goes on without the cache'''
+    directory = cacheDir()
+    if directory is None:
+        return
+    path = os.path.join(directory, key + SUFFIX)
+    temp = f"{path}.{os.getpid()}.tmp"
+    try:
+        shape.exportBinary(temp)
+        os.replace(temp, path)
+    except (OSError, RuntimeError) as e: #exportBinary raises RuntimeError on OCC write errors
+        FreeCAD.Console.PrintWarning(f"Honeycomb: cannot write cache file {path} ({e})\n")
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        return
+    evict(directory, maxBytes())
+
+def evict(directory, limit):
+    entries = []
+    for path in glob.glob(os.path.join(directory, "*" + SUFFIX)):
+        try:
+            entries.append((os.path.getmtime(path), os.path.getsize(path), path))
+        except OSError:
+            pass #removed by another FreeCAD
+    total = sum(entry[1] for entry in entries)
+    for mtime, size, path in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+def clear():
+    '''removes every file of the cache'''
+    directory = cacheDir()
+    if directory is not None:
+        evict(directory, -1)
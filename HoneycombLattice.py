@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+#Honeycomb lattice geometry -- cell centres, cell vertices and outline classification as numpy arrays
+#Does not import FreeCAD, so lattices can be sized and checked before any OCC work is done.
+#2021, by <TheMarkster> LGPL2.1 or later
+import numpy as np
+
+TAN15 = 0.2679491924311227
+SIN60 = 0.8660254037844386
+
+#unit cells, circumradius 1 centered on the origin, as closed polygons
+HEXAGON = np.array([(-1,0),(-.5,SIN60),(.5,SIN60),(1,0),(.5,-SIN60),(-.5,-SIN60),(-1,0)])
+SQUARE = np.array([(-1,-1),(1,-1),(1,1),(-1,1),(-1,-1)])
+
+CELL_OUTSIDE, CELL_INSIDE, CELL_BOUNDARY = 0, 1, 2
+
+def honeycombSpacing(radius, separation):
+    '''(xInt, yInt, array2XPos, array2YPos) of the hexagon grid: column and row pitch of the
+    first array and the offset of the second array'''
+    yInt = 2 * radius + separation - TAN15 * radius
+    xInt = 2 * SIN60 * (radius * 2 + separation - TAN15 * radius)
+    return xInt, yInt, xInt / 2, yInt / 2
+
+def squareSpacing(radius, separation):
+    '''(xInt, yInt) of the square grid'''
+    return 2 * radius + separation, 2 * radius + separation
+
+def gridCounts(width, length, xInt, yInt, countXAdjust = 0, countYAdjust = 0):
+    '''(countX, countY) as computed by the Honeycomb feature, the grid then runs from -1 to count - 1'''
+    return int(round(width / xInt) + 1 + countXAdjust), int(round(length / yInt) + 1 + countYAdjust)
+
+def gridCentres(firstX, firstY, xInt, yInt, countX, countY):
+    '''(N, 2) array of the centres of a rectangular array, column by column'''
+    xs = firstX + np.arange(-1, countX) * xInt
+    ys = firstY + np.arange(-1, countY) * yInt
+    gx, gy = np.meshgrid(xs, ys, indexing = "ij")
+    return np.column_stack((gx.ravel(), gy.ravel()))
+
+def honeycombCentres(radius, separation, width, length, xAdjust = 0, yAdjust = 0, countXAdjust = 0, countYAdjust = 0):
+    '''(N, 2) array of all hexagon centres: the first array followed by the second, offset array,
+    which has one column fewer'''
+    xInt, yInt, array2XPos, array2YPos = honeycombSpacing(radius, separation)
+    countX, countY = gridCounts(width, length, xInt, yInt, countXAdjust, countYAdjust)
+    first = gridCentres(radius, radius, xInt, yInt, countX, countY) + (xAdjust, yAdjust)
+    second = first[:-int(countY + 1)] + (array2XPos, array2YPos)
+    return np.concatenate((first, second))
+
+def squareCentres(radius, separation, width, length, xAdjust = 0, yAdjust = 0, countXAdjust = 0, countYAdjust = 0):
+    '''(N, 2) array of all square cell centres'''
+    xInt, yInt = squareSpacing(radius, separation)
+    countX, countY = gridCounts(width, length, xInt, yInt, countXAdjust, countYAdjust)
+    return gridCentres(0, 0, xInt, yInt, countX, countY) + (xAdjust, yAdjust)
+
+def estimateCells(radius, separation, width, length, square = False, countXAdjust = 0, countYAdjust = 0):
+    '''number of cells the lattice will have, without building any array'''
+    if square:
+        xInt, yInt = squareSpacing(radius, separation)
+    else:
+        xInt, yInt = honeycombSpacing(radius, separation)[:2]
+    countX, countY = gridCounts(width, length, xInt, yInt, countXAdjust, countYAdjust)
+    first = max(countX + 1, 0) * max(countY + 1, 0)
+    if square:
+        return first
+    drop = countY + 1
+    second = 0 if drop == 0 else len(range(first)[:-drop])
+    return first + second
+
+def wrapSpacing(radius, separation, circumference, square = False, countXAdjust = 0):
+    '''(columns, xInt, yInt) of a lattice wrapped around a cylinder, the column pitch is stretched or shrunk
+    so that a whole number of columns goes around the circumference'''
+    if square:
+        xInt, yInt = squareSpacing(radius, separation)
+    else:
+        xInt, yInt = honeycombSpacing(radius, separation)[:2]
+    columns = max(int(round(circumference / xInt)) + countXAdjust, 1)
+    return columns, circumference / columns, yInt
+
+def wrapCentres(radius, separation, circumference, length, square = False, xAdjust = 0, yAdjust = 0, countXAdjust = 0, countYAdjust = 0):
+    '''(N, 2) array of the cell centres of a lattice wrapped around a cylinder, x along the circumference
+    in [0, circumference), y along the axis, the columns repeat seamlessly across x = 0'''
+    columns, xInt, yInt = wrapSpacing(radius, separation, circumference, square, countXAdjust)
+    countY = gridCounts(0, length, xInt, yInt, 0, countYAdjust)[1]
+    xs = np.arange(columns) * xInt
+    ys = (0 if square else radius) + np.arange(-1, countY) * yInt
+    gx, gy = np.meshgrid(xs, ys, indexing = "ij")
+    centres = np.column_stack((gx.ravel(), gy.ravel()))
+    if not square:
+        centres = np.concatenate((centres, centres + (xInt / 2, yInt / 2)))
+    centres = centres + (xAdjust, yAdjust)
+    centres[:, 0] %= circumference
+    return centres
+
+def wrapCells(radius, separation, circumference, length, square = False, countXAdjust = 0, countYAdjust = 0):
+    '''number of cells wrapCentres will return, without building any array'''
+    columns, xInt, yInt = wrapSpacing(radius, separation, circumference, square, countXAdjust)
+    rows = max(gridCounts(0, length, xInt, yInt, 0, countYAdjust)[1] + 1, 0)
+    return columns * rows * (1 if square else 2)
+
+def cellVertices(centres, radius, unit = HEXAGON):
+    '''(N, K, 2) array of the polygon vertices of every cell, unit scaled by radius and moved to each centre'''
+    return np.asarray(centres)[:, None, :] + radius * np.asarray(unit)[None, :, :]
+
+def sampleMap(values, u, v):
+    '''bilinear samples of the 2D array values at (u, v) in [0, 1], u from the first to the last column,
+    v from the last row up to the first, as an image is seen'''
+    values = np.asarray(values, dtype = float)
+    rows, cols = values.shape
+    fx = np.clip(np.asarray(u, dtype = float), 0, 1) * (cols - 1)
+    fy = (1 - np.clip(np.asarray(v, dtype = float), 0, 1)) * (rows - 1)
+    x0 = np.floor(fx).astype(np.int64)
+    y0 = np.floor(fy).astype(np.int64)
+    x1 = np.minimum(x0 + 1, cols - 1)
+    y1 = np.minimum(y0 + 1, rows - 1)
+    tx = fx - x0
+    ty = fy - y0
+    return (values[y0, x0] * (1 - tx) + values[y0, x1] * tx) * (1 - ty) + (values[y1, x0] * (1 - tx) + values[y1, x1] * tx) * ty
+
+def gradingField(centres, kind, width, length, angle = 0, densityMap = None):
+    '''field in [0, 1] at every centre, all centres in one pass
+    Radial: 0 in the middle of the lattice up to 1 on the ellipse of width x length around it
+    Linear: 0 to 1 across the lattice in the direction angle, in degrees from the x axis
+    Map: the 2D array densityMap stretched over the bounds of the lattice and sampled bilinearly'''
+    centres = np.asarray(centres, dtype = float).reshape(-1, 2)
+    if not len(centres) or kind not in ("Radial", "Linear", "Map"):
+        return np.zeros(len(centres))
+    lo = centres.min(axis = 0)
+    span = centres.max(axis = 0) - lo
+    x, y = (centres - (lo + span / 2)).T
+    if kind == "Radial":
+        field = np.hypot(x / max(width / 2, 1e-12), y / max(length / 2, 1e-12))
+    elif kind == "Linear":
+        p = x * np.cos(np.radians(angle)) + y * np.sin(np.radians(angle))
+        field = (p - p.min()) / (p.max() - p.min()) if p.max() > p.min() else np.zeros(len(p))
+    else:
+        u, v = ((centres - lo) / np.where(span > 0, span, 1)).T
+        field = sampleMap(densityMap, u, v)
+    return np.clip(field, 0, 1)
+
+def gradedScales(field, low, steps = 0):
+    '''scale of every cell, 1 at field 0 down to low at field 1, rounded to one of steps evenly spaced
+    levels if steps is 2 or more, so the cells of each size can share one shape'''
+    scales = 1 + (low - 1) * np.asarray(field, dtype = float)
+    if steps >= 2 and low != 1:
+        scales = low + (1 - low) * np.rint((scales - low) / (1 - low) * (steps - 1)) / (steps - 1)
+    return scales
+
+def latticeBounds(centres, cellBounds):
+    '''(xmin, ymin, xmax, ymax) of a cell with bounds cellBounds = (xmin, ymin, xmax, ymax) placed at every centre'''
+    centres = np.asarray(centres)
+    return (centres[:, 0].min() + cellBounds[0], centres[:, 1].min() + cellBounds[1],
+            centres[:, 0].max() + cellBounds[2], centres[:, 1].max() + cellBounds[3])
+
+def ribIntervals(positions, halfWidth):
+    '''(N, 2) array of (lo, hi) of the gaps between consecutive rows or columns of cells centred at
+    positions, each cell spanning position - halfWidth to position + halfWidth'''
+    p = np.unique(np.round(np.asarray(positions, dtype = float), 9))
+    gaps = np.column_stack((p[:-1] + halfWidth, p[1:] - halfWidth))
+    return gaps[gaps[:, 1] > gaps[:, 0]]
+
+def tileSeams(xs, xmin, xmax, tiles):
+    '''x positions of up to tiles - 1 seams splitting [xmin, xmax] into strips of about equal width,
+    each moved to the middle of the nearest gap between two columns of cell centres xs'''
+    columns = np.unique(np.round(np.asarray(xs, dtype = float), 9))
+    gaps = (columns[:-1] + columns[1:]) / 2
+    if tiles < 2 or not len(gaps):
+        return np.array([])
+    targets = xmin + (xmax - xmin) * np.arange(1, tiles) / tiles
+    seams = np.unique(gaps[np.abs(gaps[None, :] - targets[:, None]).argmin(axis = 1)])
+    return seams[(seams > xmin) & (seams < xmax)]
+
+def rectangleDistance(x, y, xmin, ymin, xmax, ymax):
+    '''signed distance from points (x, y) to the boundary of an axis aligned rectangle,
+    negative inside the rectangle'''
+    x = np.asarray(x, dtype = float)
+    y = np.asarray(y, dtype = float)
+    dx = np.maximum(xmin - x, x - xmax)
+    dy = np.maximum(ymin - y, y - ymax)
+    outside = np.hypot(np.maximum(dx, 0), np.maximum(dy, 0))
+    return np.where((dx <= 0) & (dy <= 0), np.maximum(dx, dy), outside)
+
+def ellipseDistance(x, y, a, b, iterations = 100):
+    '''signed distance from points (x, y) to the ellipse centered on the origin with semi-axis a
+    on the x axis and b on the y axis, negative inside the ellipse
+    (robust bisection method by D. Eberly, "Distance from a Point to an Ellipse", run on all points at once)'''
+    x0 = np.abs(np.asarray(x, dtype = float))
+    y0 = np.abs(np.asarray(y, dtype = float))
+    if b > a:
+        a, b, x0, y0 = b, a, y0, x0
+    inside = (x0 / a) ** 2 + (y0 / b) ** 2 <= 1
+    z0 = x0 / a
+    z1 = y0 / b
+    g = z0 * z0 + z1 * z1 - 1
+    r0 = (a / b) ** 2
+    n0 = r0 * z0
+    s0 = z1 - 1
+    s1 = np.where(g < 0, 0, np.hypot(n0, z1) - 1)
+    s = s0
+    with np.errstate(divide = "ignore", invalid = "ignore"): #points on the major axis are replaced below
+        for ii in range(iterations):
+            s = (s0 + s1) / 2
+            gs = (n0 / (s + r0)) ** 2 + (z1 / (s + 1)) ** 2 - 1
+            s0 = np.where(gs > 0, s, s0)
+            s1 = np.where(gs < 0, s, s1)
+        dist = np.hypot(r0 * x0 / (s + r0) - x0, y0 / (s + 1) - y0)
+    #on the major axis the closest point is off the axis until the centre of curvature of the vertex
+    denom0 = a * a - b * b
+    if denom0 > 0:
+        xde0 = np.minimum(a * x0 / denom0, 1)
+        axis = np.where(a * x0 < denom0, np.hypot(a * xde0 - x0, b * np.sqrt(1 - xde0 * xde0)), np.abs(x0 - a))
+    else:
+        axis = np.abs(x0 - a)
+    dist = np.where(y0 > 0, dist, axis)
+    return np.where(inside, -dist, dist)
+
+def classifyCells(distance, cellRadius, tolerance = 1e-6):
+    '''classifies cells from the signed distance of their centres to the outline and their circumradius
+    returns an array of CELL_OUTSIDE, CELL_INSIDE or CELL_BOUNDARY'''
+    distance = np.asarray(distance, dtype = float)
+    flags = np.full(distance.shape, CELL_BOUNDARY, dtype = np.int8)
+    flags[distance < -cellRadius - tolerance] = CELL_INSIDE
+    flags[distance > cellRadius + tolerance] = CELL_OUTSIDE
+    return flags
+
+def _expand(keys, sortedKeys, order):
+    '''(i, j) pairs of every i in keys with every order[j] whose sortedKeys[j] equals keys[i]'''
+    start = np.searchsorted(sortedKeys, keys, "left")
+    count = np.searchsorted(sortedKeys, keys, "right") - start
+    total = count.sum()
+    i = np.repeat(np.arange(len(keys)), count)
+    j = np.repeat(start - np.cumsum(count) + count, count) + np.arange(total)
+    return i, order[j]
+
+def polygonDistance(x, y, rings, reach):
+    '''signed distance from points (x, y) to the boundary of the region bounded by rings, a list of closed
+    polygons as (K, 2) arrays (outer boundary and holes, even-odd rule), negative inside
+    distances are exact up to reach, points farther from the boundary get -inf or inf
+    the boundary segments are put in a bucket grid of cell size reach, so each point is only
+    tested against the segments near it and the cost tracks the outline length, not its area'''
+    x = np.asarray(x, dtype = float)
+    y = np.asarray(y, dtype = float)
+    rings = [np.asarray(r, dtype = float) for r in rings]
+    a = np.concatenate([r for r in rings])
+    b = np.concatenate([np.roll(r, -1, axis = 0) for r in rings])
+    size = float(reach) if reach > 0 else 1.0
+    x0, y0 = np.minimum(a, b).min(axis = 0) - size
+    #inside: even-odd count of the segments crossed by a ray to +x, only segments of the point's band of rows
+    lo = np.floor((np.minimum(a[:, 1], b[:, 1]) - y0) / size).astype(np.int64)
+    hi = np.floor((np.maximum(a[:, 1], b[:, 1]) - y0) / size).astype(np.int64)
+    n = hi - lo + 1
+    seg = np.repeat(np.arange(len(a)), n)
+    band = lo[seg] + np.arange(len(seg)) - np.repeat(np.cumsum(n) - n, n)
+    order = np.argsort(band, kind = "stable")
+    i, s = _expand(np.floor((y - y0) / size).astype(np.int64), band[order], seg[order])
+    ya, yb = a[s, 1], b[s, 1]
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        xc = a[s, 0] + (y[i] - ya) * (b[s, 0] - a[s, 0]) / (yb - ya)
+    crossing = ((ya > y[i]) != (yb > y[i])) & (x[i] < xc)
+    inside = np.bincount(i[crossing], minlength = len(x)) % 2 == 1
+    #near: distance to the segments in the point's bucket, segments are entered in every bucket within reach
+    ix0 = np.floor((np.minimum(a[:, 0], b[:, 0]) - size - x0) / size).astype(np.int64)
+    ix1 = np.floor((np.maximum(a[:, 0], b[:, 0]) + size - x0) / size).astype(np.int64)
+    iy0 = np.floor((np.minimum(a[:, 1], b[:, 1]) - size - y0) / size).astype(np.int64)
+    iy1 = np.floor((np.maximum(a[:, 1], b[:, 1]) + size - y0) / size).astype(np.int64)
+    nx, ny = ix1 - ix0 + 1, iy1 - iy0 + 1
+    seg = np.repeat(np.arange(len(a)), nx * ny)
+    k = np.arange(len(seg)) - np.repeat(np.cumsum(nx * ny) - nx * ny, nx * ny)
+    columns = int(np.floor((max(a[:, 0].max(), b[:, 0].max()) + size - x0) / size)) + 2
+    bucket = (iy0[seg] + k // nx[seg]) * columns + ix0[seg] + k % nx[seg]
+    order = np.argsort(bucket, kind = "stable")
+    px = np.floor((x - x0) / size).astype(np.int64)
+    py = np.floor((y - y0) / size).astype(np.int64)
+    keys = np.where((px >= 0) & (px < columns) & (py >= 0), py * columns + px, -1)
+    i, s = _expand(keys, bucket[order], seg[order])
+    d = b[s] - a[s]
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        t = np.clip(((x[i] - a[s, 0]) * d[:, 0] + (y[i] - a[s, 1]) * d[:, 1]) / (d * d).sum(axis = 1), 0, 1)
+    t = np.nan_to_num(t)
+    dist = np.full(len(x), np.inf)
+    np.minimum.at(dist, i, np.hypot(a[s, 0] + t * d[:, 0] - x[i], a[s, 1] + t * d[:, 1] - y[i]))
+    dist[dist > reach] = np.inf
+    return np.where(inside, -dist, dist)
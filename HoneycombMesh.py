@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#Honeycomb mesh -- watertight triangle mesh of a stepped prism from 2D triangulations, and binary STL output
+#Does not import FreeCAD.  The honeycomb is a 2D perforated face extruded by Height plus the border ring
+#extruded by Height + BorderHeightOffset, so only the 2D faces need triangulating; the bottom, top and walls
+#are made here from the triangulation with numpy.
+#2021, by <TheMarkster> LGPL2.1 or later
+import numpy as np
+
+def weld(points, tolerance = 1e-7):
+    '''(unique points, index of each point in them), points closer than about tolerance are merged'''
+    keys = np.round(np.asarray(points, dtype = float) / tolerance).astype(np.int64)
+    keys, first, inverse = np.unique(keys, axis = 0, return_index = True, return_inverse = True)
+    return np.asarray(points, dtype = float)[first], inverse.ravel()
+
+def prismMesh(pieces, tolerance = 1e-7):
+    '''watertight mesh of the prisms of pieces = [(points (P, 2), triangles (T, 3), height)], all standing on z = 0,
+    pieces of different height that share edges get a step wall between them
+    returns (vertices (V, 3), triangles (F, 3)) with the triangles oriented outwards'''
+    points = np.concatenate([np.asarray(p, dtype = float).reshape(-1, 2) for p, t, h in pieces])
+    offsets = np.cumsum([0] + [len(np.asarray(p).reshape(-1, 2)) for p, t, h in pieces])
+    tris = np.concatenate([np.asarray(t, dtype = np.int64).reshape(-1, 3) + o for (p, t, h), o in zip(pieces, offsets)])
+    levels, level = np.unique([h for p, t, h in pieces], return_inverse = True)
+    level = np.repeat(level.ravel(), [len(np.asarray(t).reshape(-1, 3)) for p, t, h in pieces])
+    points, index = weld(points, tolerance)
+    tris = index[tris]
+    #counterclockwise seen from +z, degenerate triangles dropped
+    a, b, c = points[tris[:, 0]], points[tris[:, 1]], points[tris[:, 2]]
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    keep = np.abs(area) > tolerance * tolerance
+    tris, level, area = tris[keep], level[keep], area[keep]
+    tris[area < 0] = tris[area < 0][:, [0, 2, 1]]
+    n = len(points)
+    top = lambda ids, lv: n * (1 + lv) + ids #vertex id of point ids at the top of level lv, level -1 is the bottom
+    bottom = tris[:, [0, 2, 1]]
+    upper = top(tris, level[:, None])
+    #walls: an edge used once is on the outline, an edge used twice by pieces of different height is a step
+    edges = np.concatenate((tris[:, [0, 1]], tris[:, [1, 2]], tris[:, [2, 0]]))
+    edgeLevel = np.tile(level, 3)
+    key = np.sort(edges, axis = 1)
+    key = key[:, 0] * n + key[:, 1]
+    order = np.argsort(key, kind = "stable")
+    unique, start, count = np.unique(key[order], return_index = True, return_counts = True)
+    once = order[start[count == 1]]
+    i, j = order[start[count == 2]], order[start[count == 2] + 1]
+    step = edgeLevel[i] != edgeLevel[j]
+    i, j = i[step], j[step]
+    high = np.where(edgeLevel[i] > edgeLevel[j], i, j) #the wall faces away from the higher piece, to the right of its edge
+    low = np.where(edgeLevel[i] > edgeLevel[j], j, i)
+    #a wall runs from level lo (-1 for the bottom) up to level hi along its edge
+    wallEdges = np.concatenate((edges[once], edges[high]))
+    lo = np.concatenate((np.full(len(once), -1), edgeLevel[low]))
+    hi = np.concatenate((edgeLevel[once], edgeLevel[high]))
+    #levels whose top touches each point, a wall is split there so it meets the walls and tops of that level edge to edge
+    touched = np.zeros((n, len(levels)), dtype = bool)
+    touched[tris.ravel(), np.repeat(level, 3)] = True
+    walls = wallMesh(wallEdges, lo, hi, touched, top)
+    faces = np.concatenate([bottom, upper] + walls)
+    vertices = np.concatenate([np.column_stack((points, np.zeros(n)))] +
+                              [np.column_stack((points, np.full(n, height))) for height in levels])
+    used, faces = np.unique(faces, return_inverse = True)
+    return vertices[used], faces.reshape(-1, 3)
+
+def wallMesh(edges, lo, hi, touched, vertex):
+    '''triangles of the vertical walls over edges (W, 2) from level lo to level hi, facing to the right of
+    each edge, a wall side is split at every level between lo and hi that touched (points, levels) marks at its
+    point, vertex(ids, levels) is the vertex id of points ids at levels, level -1 being the bottom'''
+    between = np.arange(touched.shape[1])[None, :]
+    inner = lambda ids: touched[ids] & (between > lo[:, None]) & (between < hi[:, None])
+    split = inner(edges[:, 0]).any(axis = 1) | inner(edges[:, 1]).any(axis = 1)
+    e, l, h = edges[~split], lo[~split], hi[~split]
+    walls = [np.column_stack((vertex(e[:, 0], l), vertex(e[:, 1], l), vertex(e[:, 1], h))),
+             np.column_stack((vertex(e[:, 0], l), vertex(e[:, 1], h), vertex(e[:, 0], h)))]
+    #the few walls meeting a third level are zipped up their two sides one level at a time
+    strips = []
+    for (a, b), l, h in zip(edges[split].tolist(), lo[split].tolist(), hi[split].tolist()):
+        left = [l] + [k for k in range(l + 1, h) if touched[a, k]] + [h]
+        right = [l] + [k for k in range(l + 1, h) if touched[b, k]] + [h]
+        p = q = 0
+        while p < len(left) - 1 or q < len(right) - 1:
+            if q < len(right) - 1 and (p == len(left) - 1 or right[q + 1] <= left[p + 1]):
+                strips.append(((a, left[p]), (b, right[q]), (b, right[q + 1])))
+                q += 1
+            else:
+                strips.append(((a, left[p]), (b, right[q]), (a, left[p + 1])))
+                p += 1
+    if strips:
+        strips = np.array(strips)
+        walls.append(vertex(strips[..., 0], strips[..., 1]))
+    return walls
+
+def transform(vertices, matrix):
+    '''vertices moved by the 4x4 matrix, e.g. of a placement'''
+    matrix = np.asarray(matrix, dtype = float).reshape(4, 4)
+    return vertices @ matrix[:3, :3].T + matrix[:3, 3]
+
+def writeStl(path, vertices, triangles):
+    '''writes a binary STL file'''
+    v = vertices[triangles].astype(np.float32)
+    normals = np.cross(v[:, 1] - v[:, 0], v[:, 2] - v[:, 0])
+    length = np.linalg.norm(normals, axis = 1)
+    normals /= np.where(length > 0, length, 1)[:, None]
+    record = np.dtype([("normal", "<f4", 3), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")])
+    data = np.zeros(len(triangles), dtype = record)
+    data["normal"] = normals
+    data["vertices"] = v
+    with open(path, "wb") as f:
+        f.write(b"Honeycomb".ljust(80, b" "))
+        f.write(np.uint32(len(triangles)).tobytes())
+        data.tofile(f)
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+#Honeycomb tiles -- cuts a large honeycomb panel as vertical tiles in a pool of headless FreeCAD processes
+#Shapes go to and from the workers as BREP strings.  The workers import only FreeCAD, Part and
+#HoneycombLattice, never the GUI.
+#2021, by <TheMarkster> LGPL2.1 or later
+import FreeCAD, Part
+import os, sys, shutil, atexit
+import multiprocessing, concurrent.futures
+import numpy as np
+import HoneycombLattice
+
+_pool = None
+_poolWorkers = 0
+
+def pythonExecutable():
+    '''python interpreter for the worker processes, inside the FreeCAD GUI sys.executable is FreeCAD itself'''
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        return sys.executable
+    home = FreeCAD.getHomePath()
+    for name in ("python", "python3", "python.exe"):
+        candidate = os.path.join(home, "bin", name)
+        if os.path.isfile(candidate):
+            return candidate
+    return shutil.which("python3") or shutil.which("python") or sys.executable
+
+def getPool(workers):
+    '''process pool of workers processes, kept between recomputes because starting FreeCAD in each worker is slow'''
+    global _pool, _poolWorkers
+    if _pool is None or _poolWorkers != workers:
+        shutdownPool()
+        context = multiprocessing.get_context("spawn")
+        context.set_executable(pythonExecutable())
+        _pool = concurrent.futures.ProcessPoolExecutor(max_workers = workers, mp_context = context)
+        _poolWorkers = workers
+    return _pool
+
+def shutdownPool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait = False, cancel_futures = True)
+        _pool = None
+
+atexit.register(shutdownPool)
+
+def shapeFromBrep(brep):
+    shape = Part.Shape()
+    shape.importBrepFromString(brep)
+    return shape
+
+def placeAt(template, centres):
+    rot = FreeCAD.Rotation()
+    return [template.moved(FreeCAD.Placement(FreeCAD.Vector(x, y, 0), rot)) for x, y in centres]
+
+def holeWire(face, template):
+    '''outer wire of template oriented to be added to face as a hole, that is clockwise about the face normal,
+    cutHoles does not fix the orientation by itself'''
+    wire = template.OuterWire if template.ShapeType == "Face" else template.Wires[0]
+    pts = wire.discretize(64)
+    area = sum(a.x * b.y - b.x * a.y for a, b in zip(pts, pts[1:] + pts[:1]))
+    if area * face.normalAt(0,0).z > 0:
+        wire.reverse()
+    return wire
+
+def cutTile(job):
+    '''worker: restricts the outline to the tile strip, adds the inner cells as holes and
+    cuts the cells crossing the outline or the tile seams, returns the tile faces as BREP'''
+    outline = shapeFromBrep(job["outline"]).Faces[0]
+    template = shapeFromBrep(job["template"])
+    hole = shapeFromBrep(job["hole"])
+    x0, x1 = job["strip"]
+    bb = outline.BoundBox
+    strip = Part.makePlane(x1 - x0, bb.YLength + 2, FreeCAD.Vector(x0, bb.YMin - 1, bb.ZMin))
+    faces = outline.common(strip).Faces
+    if not faces:
+        return None
+    if job["holes"]:
+        #a non convex outline can leave several faces in the strip, each hole goes to the face it lies in
+        holes = job["holes"]
+        for face in faces:
+            if len(faces) > 1:
+                z = face.BoundBox.ZMin
+                inside = [face.isInside(FreeCAD.Vector(c[0], c[1], z), 1e-6, True) for c in holes]
+                inFace = [c for c, i in zip(holes, inside) if i]
+                holes = [c for c, i in zip(holes, inside) if not i]
+            else:
+                inFace = holes
+            if inFace:
+                face.cutHoles(placeAt(holeWire(face, hole), inFace))
+    tile = faces[0] if len(faces) == 1 else Part.makeCompound(faces)
+    if job["boundary"]:
+        return tile.cut(Part.makeCompound(placeAt(template, job["boundary"]))).exportBrepToString()
+    return tile.exportBrepToString()
+
+def tileJobs(outline, template, hole, centres, flags, cellRadius, tiles):
+    '''splits the classified lattice into one job per tile, seams are placed in the gaps between cell columns
+    cells fully inside the outline and their tile become holes, cells crossing the outline or a seam
+    are cut by the boolean in every tile they touch'''
+    bb = outline.BoundBox
+    seams = HoneycombLattice.tileSeams(centres[:, 0], bb.XMin, bb.XMax, tiles)
+    edges = [bb.XMin - 1] + list(seams) + [bb.XMax + 1]
+    outlineBrep = outline.exportBrepToString()
+    templateBrep = template.exportBrepToString()
+    holeBrep = hole.exportBrepToString()
+    simple = len(template.Wires) == 1
+    xs = centres[:, 0]
+    jobs = []
+    for x0, x1 in zip(edges[:-1], edges[1:]):
+        inTile = (xs - cellRadius > x0) & (xs + cellRadius < x1)
+        touches = (xs + cellRadius >= x0) & (xs - cellRadius <= x1) & (flags != HoneycombLattice.CELL_OUTSIDE)
+        holes = inTile & (flags == HoneycombLattice.CELL_INSIDE) if simple else np.zeros(len(xs), dtype = bool)
+        jobs.append({"outline": outlineBrep, "template": templateBrep, "hole": holeBrep, "strip": (x0, x1),
+                     "holes": centres[holes].tolist(), "boundary": centres[touches & ~holes].tolist()})
+    return jobs
+
+def cutTiled(outline, template, hole, centres, flags, cellRadius, tiles, workers = 0):
+    '''cuts the classified lattice out of the outline face tile by tile in a process pool,
+    template is the cell face for the boolean cut and hole its wire, oriented as a hole of each tile face,
+    then joins the tile faces back into one face, falls back to cutting the tiles in this
+    process if the pool cannot be started'''
+    jobs = tileJobs(outline, template, hole, centres, flags, cellRadius, tiles)
+    workers = workers if workers > 0 else (os.cpu_count() or 1)
+    try:
+        results = list(getPool(min(workers, len(jobs))).map(cutTile, jobs))
+    except Exception as e:
+        FreeCAD.Console.PrintWarning(f"Honeycomb: tiled cut in worker processes failed ({e}), cutting tiles in this process\n")
+        shutdownPool()
+        results = [cutTile(job) for job in jobs]
+    faces = [f for brep in results if brep for f in shapeFromBrep(brep).Faces]
+    if len(faces) == 1:
+        return faces[0]
+    #the tiles only meet along the seams, removeSplitter merges the seam edges away
+    return faces[0].multiFuse(faces[1:]).removeSplitter()
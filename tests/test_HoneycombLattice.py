@@ -0,0 +1,69 @@
+#tests of HoneycombLattice, numpy only, run with: python -m pytest tests
+import os, sys
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import HoneycombLattice
+
+#(radius, separation, width, length, xAdjust, yAdjust, countXAdjust, countYAdjust)
+CASES = [(5, 1, 100, 60, 0, 0, 0, 0), (3, 0.5, 47, 81, 1.5, -2, 2, -1), (10, 2, 5, 5, 0, 0, -1, 3), (1, 0, 30, 30, 0, 0, -3, -3)]
+
+def loopHoneycomb(radius, separation, width, length, xAdjust, yAdjust, countXAdjust, countYAdjust):
+    '''hexagon centres as the nested loops of the original Honeycomb feature placed them'''
+    tan15 = 0.2679491924311227
+    sin60 = 0.8660254037844386
+    yInt = (2 * radius + separation - tan15 * radius)
+    xInt = (2 * sin60 * (radius * 2 + separation - tan15 * radius))
+    array2XPos = (sin60 * (radius * 2 + separation - tan15 * radius))
+    array2YPos = yInt / 2.0
+    countX = round(width / xInt) + 1 + countXAdjust
+    countY = round(length / yInt) + 1 + countYAdjust
+    vectors = []
+    for xx in range(-1, int(countX)):
+        for yy in range(-1, int(countY)):
+            vectors.append((radius + xx * xInt + xAdjust, radius + yy * yInt + yAdjust))
+    return vectors + [(x + array2XPos, y + array2YPos) for x, y in vectors[:-int(countY + 1)]]
+
+def loopSquare(radius, separation, width, length, xAdjust, yAdjust, countXAdjust, countYAdjust):
+    '''square cell centres as the nested loops of the original cross grid placed them'''
+    xInt = yInt = (2 * radius + separation)
+    countX = round(width / xInt) + 1 + countXAdjust
+    countY = round(length / yInt) + 1 + countYAdjust
+    return [(xx * xInt + xAdjust, yy * yInt + yAdjust) for xx in range(-1, int(countX)) for yy in range(-1, int(countY))]
+
+def test_honeycomb_centres_match_the_loops():
+    for case in CASES:
+        centres = HoneycombLattice.honeycombCentres(*case)
+        assert np.allclose(centres, np.array(loopHoneycomb(*case)).reshape(-1, 2))
+
+def test_square_centres_match_the_loops():
+    for case in CASES:
+        centres = HoneycombLattice.squareCentres(*case)
+        assert np.allclose(centres, np.array(loopSquare(*case)).reshape(-1, 2))
+
+def test_estimate_cells_counts_the_centres():
+    for radius, separation, width, length, xAdjust, yAdjust, countXAdjust, countYAdjust in CASES:
+        for square, centres in ((False, HoneycombLattice.honeycombCentres), (True, HoneycombLattice.squareCentres)):
+            count = len(centres(radius, separation, width, length, xAdjust, yAdjust, countXAdjust, countYAdjust))
+            assert HoneycombLattice.estimateCells(radius, separation, width, length, square, countXAdjust, countYAdjust) == count
+
+def test_rectangle_distance_signs():
+    d = HoneycombLattice.rectangleDistance([5, 0, 13, 13, 5], [2, 2, 2, 8, 4], 0, 0, 10, 4)
+    assert np.allclose(d, [-2, 0, 3, 5, 0])
+
+def test_ellipse_distance_signs():
+    d = HoneycombLattice.ellipseDistance([0, 0, 4, 0, 7, 0, 0], [0, 1, 0, 2, 0, -5, 3], 4, 2)
+    assert np.allclose(d, [-2, -1, 0, 0, 3, 3, 1])
+    tall = HoneycombLattice.ellipseDistance([0, 3, 0], [0, 0, -6], 2, 4)
+    assert np.allclose(tall, [-2, 1, 2])
+
+def test_classify_cells():
+    d = np.array([-5, -1.5, -1, 0, 1, 1.5, 5])
+    classes = HoneycombLattice.classifyCells(d, 1)
+    inside, boundary, outside = HoneycombLattice.CELL_INSIDE, HoneycombLattice.CELL_BOUNDARY, HoneycombLattice.CELL_OUTSIDE
+    assert classes.tolist() == [inside, inside, boundary, boundary, boundary, outside, outside]
+
+def test_wrap_cells_counts_the_centres():
+    for radius, separation, width, length, xAdjust, yAdjust, countXAdjust, countYAdjust in CASES:
+        for square in (False, True):
+            centres = HoneycombLattice.wrapCentres(radius, separation, width, length, square, xAdjust, yAdjust, countXAdjust, countYAdjust)
+            assert HoneycombLattice.wrapCells(radius, separation, width, length, square, countXAdjust, countYAdjust) == len(centres)
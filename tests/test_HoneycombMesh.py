@@ -0,0 +1,44 @@
+#tests of HoneycombMesh, numpy only, run with: python -m pytest tests
+import os, sys
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import HoneycombMesh
+
+def square(x0, y0, size = 1):
+    '''points and triangles of a square as a piece'''
+    return [(x0, y0), (x0 + size, y0), (x0 + size, y0 + size), (x0, y0 + size)], [(0, 1, 2), (0, 2, 3)]
+
+def unmatched(triangles):
+    '''half edges without the reversed twin a closed, consistently oriented mesh has for each'''
+    half = np.concatenate((triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]))
+    edges = set(map(tuple, half.tolist()))
+    return [e for e in edges if (e[1], e[0]) not in edges]
+
+def volume(vertices, triangles):
+    a, b, c = vertices[triangles[:, 0]], vertices[triangles[:, 1]], vertices[triangles[:, 2]]
+    return np.einsum("ij,ij->i", a, np.cross(b, c)).sum() / 6
+
+def test_single_prism():
+    vertices, triangles = HoneycombMesh.prismMesh([square(0, 0) + (2,)])
+    assert unmatched(triangles) == []
+    assert np.isclose(volume(vertices, triangles), 2)
+
+def test_stepped_squares():
+    vertices, triangles = HoneycombMesh.prismMesh([square(0, 0) + (1,), square(1, 0) + (2,)])
+    assert unmatched(triangles) == []
+    assert np.isclose(volume(vertices, triangles), 3)
+
+def test_three_levels_around_a_point():
+    pieces = [square(0, 0) + (1,), square(1, 0) + (2,), square(0, 1) + (3,), square(1, 1) + (1.5,)]
+    vertices, triangles = HoneycombMesh.prismMesh(pieces)
+    assert unmatched(triangles) == []
+    assert np.isclose(volume(vertices, triangles), 7.5)
+
+def test_ring_around_a_lower_grid():
+    #a square ring of height 1.1 around a unit square of height 1 with a notch, as a border meets the boundary cells
+    ring = ([(-1, -1), (2, -1), (2, 2), (-1, 2), (0, 0), (1, 0), (1, 1), (0, 1)],
+            [(0, 1, 5), (0, 5, 4), (1, 2, 6), (1, 6, 5), (2, 3, 7), (2, 7, 6), (3, 0, 4), (3, 4, 7)], 1.1)
+    grid = ([(0, 0), (1, 0), (1, 1), (0, 1), (0.5, 0.5)], [(0, 1, 4), (1, 2, 4), (2, 3, 4)], 1)
+    vertices, triangles = HoneycombMesh.prismMesh([ring, grid])
+    assert unmatched(triangles) == []
+    assert np.isclose(volume(vertices, triangles), 8 * 1.1 + 0.75)